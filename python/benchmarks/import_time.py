@@ -0,0 +1,90 @@
+'''
+Import-time benchmark and budget check for the bug package.
+
+Each measurement runs in a fresh interpreter. The cost of `import bug` followed by
+the lookup of a light function (compute_unemployment_gap) is measured on top of the
+import of numpy and pandas, which that function needs anyway. The check fails if
+this overhead exceeds the budget, or if a heavy dependency was imported.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 50] [--repeat 7]
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['matplotlib', 'statsmodels', 'ruptures', 'scipy.optimize', 'scipy.stats']
+
+_PROBE = '''
+import sys, time, json
+import numpy, pandas
+t0 = time.perf_counter()
+import bug
+bug.compute_unemployment_gap
+t1 = time.perf_counter()
+print(json.dumps({{'ms': 1000*(t1-t0), 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+_COLD = '''
+import time, json
+t0 = time.perf_counter()
+import bug
+bug.compute_unemployment_gap
+print(json.dumps({'ms': 1000*(time.perf_counter()-t0)}))
+'''
+
+
+###############################################################
+def measure(repeat=7):
+    '''
+    Return the best import overhead of bug in ms (over numpy and pandas), the best
+    cold import time in ms (including numpy and pandas), and the heavy modules loaded.
+    '''
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(os.path.dirname(__file__), '..'),
+                                                      env.get('PYTHONPATH')]))
+
+    def run(code):
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    probes = [run(_PROBE.format(heavy=HEAVY_MODULES)) for _ in range(repeat)]
+    cold = [run(_COLD)['ms'] for _ in range(repeat)]
+
+    return min(p['ms'] for p in probes), min(cold), probes[0]['loaded']
+
+
+###############################################################
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Import-time benchmark and budget check for bug.')
+    parser.add_argument('--budget-ms', type=float, default=50., help='max import overhead of bug, in ms')
+    parser.add_argument('--repeat', type=int, default=7, help='number of fresh interpreters per measure')
+    args = parser.parse_args(argv)
+
+    overhead, cold, loaded = measure(args.repeat)
+
+    print('import bug + compute_unemployment_gap: {:.1f} ms over numpy/pandas, {:.1f} ms cold'.format(overhead, cold))
+
+    ok = True
+
+    if loaded:
+        print('FAIL: heavy modules imported: ' + ', '.join(loaded))
+        ok = False
+
+    if overhead > args.budget_ms:
+        print('FAIL: import overhead above the budget of {:.0f} ms'.format(args.budget_ms))
+        ok = False
+
+    if ok:
+        print('OK: within the budget of {:.0f} ms'.format(args.budget_ms))
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
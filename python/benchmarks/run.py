@@ -0,0 +1,312 @@
+'''
+Benchmark suite for the hot paths of the bug package.
+
+Each case is timed (best of --repeat runs) and its peak memory measured with
+tracemalloc (in a separate run), for the paper sample (276 quarters, from data.xlsx
+when it can be read), a monthly-history length (900) and synthetic series up to
+20000 points. Results are appended to a JSON history, and compared with the previous
+run of the same case on the same machine to catch regressions. Cases with a
+`backend` parameter are run with both the ruptures/statsmodels and the native backends.
+
+Usage:
+    python benchmarks/run.py                       # all cases, all sizes
+    python benchmarks/run.py --quick               # sizes 276 and 900 only
+    python benchmarks/run.py -k breakpoints --sizes 276 2000 --repeat 5
+    python benchmarks/run.py --fail-above 1.25     # exit 1 if a case got 25% slower
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bug
+
+
+SIZES = [276, 900, 2000, 5000, 20000]
+QUICK_SIZES = [276, 900]
+
+HISTORY = Path(__file__).resolve().parent / 'history.json'
+
+
+###############################################################
+def make_beveridge_data(n, seed=0):
+    '''
+    Return log_u and log_v of length n. For n=276, the 1951Q1--2019Q4 data of the paper
+    when data.xlsx can be read; otherwise a synthetic Beveridge curve with 6 regimes.
+    '''
+
+    if n == 276:
+        try:
+            return np.log(bug.get_unemployment_rate()), np.log(bug.get_vacancy_rate())
+        except Exception:
+            pass
+
+    rng = np.random.default_rng(seed)
+
+    # mean-reverting log unemployment, and a Beveridge curve shifting across regimes
+    log_u = np.empty(n)
+    log_u[0] = np.log(0.055)
+    shocks = rng.normal(scale=0.06, size=n)
+    for t in range(1, n):
+        log_u[t] = log_u[t-1] + 0.08*(np.log(0.055) - log_u[t-1]) + shocks[t]
+
+    regimes = np.minimum(np.arange(n) * 6 // n, 5)
+    elasticity = rng.uniform(0.6, 1.2, size=6)[regimes]
+    intercept = rng.normal(-6., 0.2, size=6)[regimes]
+    log_v = intercept - elasticity*log_u + rng.normal(scale=0.05, size=n)
+
+    return pd.Series(log_u), pd.Series(log_v)
+
+
+###############################################################
+def make_flows(n, seed=0):
+    # monthly unemployment, short-term unemployment and labor-force levels
+
+    rng = np.random.default_rng(seed)
+
+    h_level = 100000. * np.exp(np.cumsum(rng.normal(0.001, 0.002, size=n)))
+    u_rate = np.clip(0.055 + np.cumsum(rng.normal(scale=0.001, size=n)) * 0.2, 0.02, 0.15)
+    u_level = h_level * u_rate
+    u_short = u_level * rng.uniform(0.3, 0.5, size=n)
+
+    return pd.Series(u_level), pd.Series(u_short), pd.Series(h_level)
+
+
+###############################################################
+def make_dmp_inputs(n, seed=0):
+    # eta, lambda/omega, lambda and omega series of plausible magnitudes
+
+    rng = np.random.default_rng(seed)
+
+    eta = pd.Series(rng.uniform(0.4, 0.7, size=n))
+    lamb = pd.Series(rng.uniform(0.08, 0.12, size=n))
+    omega = pd.Series(rng.uniform(1.5, 2.5, size=n))
+
+    return eta, lamb / omega, lamb, omega
+
+
+###############################################################
+def _signal(log_u, log_v):
+
+    return np.column_stack((np.asarray(log_v), np.asarray(log_u), np.ones(len(log_v))))
+
+
+###############################################################
+# each case: name -> (setup(n, backend) returning a callable, backends, max size per backend)
+
+def _setup_breakpoints(n, backend):
+    log_u, log_v = make_beveridge_data(n)
+    return lambda: bug.get_bp_breakpoints(log_u, log_v, backend=backend)
+
+
+def _setup_evaluate(n, backend):
+    log_u, log_v = make_beveridge_data(n)
+    signal = _signal(log_u, log_v)
+    return lambda: bug.evaluate_num_breaks(signal, 6, min_size=max(4, int(0.1*n)), backend=backend)
+
+
+def _setup_elasticity(n, backend):
+    log_u, log_v = make_beveridge_data(n)
+    bkps = [0] + [n*k//6 for k in range(1, 6)] + [n]
+    backend = 'statsmodels' if backend == 'ruptures' else backend
+    return lambda: bug.compute_beveridge_elasticity(log_u, log_v, bkps_in=bkps, backend=backend)
+
+
+def _setup_rolling(n, backend):
+    log_u, log_v = make_beveridge_data(n)
+    return lambda: bug.compute_rolling_beveridge_elasticity(log_u, log_v, window=[40, 80, None])
+
+
+def _setup_separation(n, backend):
+    u_level, u_short, h_level = make_flows(n)
+    return lambda: bug.compute_job_separation_rate(u_level, u_short, h_level, quarterly=False, adjust_short=False)
+
+
+def _setup_endogenous(n, backend):
+    eta, lo, _, _ = make_dmp_inputs(n)
+    return lambda: bug.compute_endogenous_efficiency(eta, lo)
+
+
+def _setup_hosios(n, backend):
+    eta, _, lamb, omega = make_dmp_inputs(n)
+    return lambda: bug.compute_hosios_efficiency(eta, lamb, omega, u0=0.05)
+
+
+def _setup_suffstats(n, backend):
+    log_u, log_v = make_beveridge_data(n)
+    u, v = np.exp(log_u), np.exp(log_v)
+    epsilon = pd.Series(np.full(n, 0.9), index=u.index)
+    theta = v / u
+
+    def run():
+        bug.compute_unemployment_gap(u, v, epsilon=epsilon)
+        bug.compute_efficient_unemployment(u, v, use_sqrt_uv=True)
+        bug.compute_efficient_tightness(epsilon)
+        bug.compute_beveridge_inverse(theta)
+        bug.compute_recruiting_inverse(theta, epsilon)
+        bug.compute_nonwork_inverse(theta, epsilon)
+
+    return run
+
+
+# the pure-python ruptures dynamic program is quadratic with a large constant,
+# so it is only run on the short samples
+CASES = {
+    'get_bp_breakpoints': (_setup_breakpoints, {'ruptures': 900, 'native': None}),
+    'evaluate_num_breaks': (_setup_evaluate, {'ruptures': 900, 'native': None}),
+    'compute_beveridge_elasticity': (_setup_elasticity, {'ruptures': None, 'native': None}),
+    'compute_rolling_beveridge_elasticity': (_setup_rolling, {None: None}),
+    'compute_job_separation_rate': (_setup_separation, {None: None}),
+    'compute_endogenous_efficiency': (_setup_endogenous, {None: None}),
+    'compute_hosios_efficiency': (_setup_hosios, {None: None}),
+    'suffstats': (_setup_suffstats, {None: None}),
+}
+
+
+###############################################################
+def run_case(setup, n, backend, repeat):
+    '''
+    Return the best time (s) over repeat runs, the number of runs, and the peak memory
+    (bytes) allocated by one run.
+    '''
+
+    fn = setup(n, backend)
+
+    times = []
+    while len(times) < repeat:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        # a single run of the slow cases is enough
+        if sum(times) > 10.:
+            break
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(times), len(times), peak
+
+
+###############################################################
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmark suite for the bug package.')
+    parser.add_argument('-k', dest='filter', default='', help='only run the cases whose name contains this')
+    parser.add_argument('--sizes', type=int, nargs='+', default=None, help='series lengths (default: {})'.format(SIZES))
+    parser.add_argument('--quick', action='store_true', help='only the sizes {}'.format(QUICK_SIZES))
+    parser.add_argument('--backend', choices=['ruptures', 'native'], default=None, help='only this backend')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--history', type=Path, default=HISTORY, help='JSON history file (default: %(default)s)')
+    parser.add_argument('--no-save', action='store_true', help='do not append the results to the history')
+    parser.add_argument('--fail-above', type=float, default=None,
+                        help='exit with status 1 if a case is slower than this ratio to its previous result')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    history = _load_history(args.history)
+    previous = _previous_results(history)
+
+    results = []
+    regressions = []
+
+    print('{:<40}{:<10}{:>7}{:>12}{:>12}{:>10}'.format('case', 'backend', 'n', 'time (ms)', 'peak (KiB)', 'vs prev'))
+
+    for name, (setup, backends) in CASES.items():
+        if args.filter not in name:
+            continue
+
+        for backend, max_size in backends.items():
+            if args.backend is not None and backend not in (None, args.backend):
+                continue
+
+            for n in sizes:
+                if max_size is not None and n > max_size:
+                    continue
+
+                seconds, runs, peak = run_case(setup, n, backend, args.repeat)
+
+                result = {'case': name, 'backend': backend, 'n': n, 'seconds': seconds, 'runs': runs,
+                          'peak_bytes': peak}
+                results.append(result)
+
+                prev = previous.get((name, backend, n))
+                ratio = seconds / prev['seconds'] if prev else None
+
+                if ratio is not None and args.fail_above is not None and ratio > args.fail_above:
+                    regressions.append(result)
+
+                print('{:<40}{:<10}{:>7}{:>12.2f}{:>12.0f}{:>10}'.format(
+                    name, backend or '-', n, 1000*seconds, peak/1024., '' if ratio is None else '{:.2f}x'.format(ratio)))
+
+    if not args.no_save:
+        history.append(dict(_environment(), results=results))
+        with open(args.history, 'w') as fh:
+            json.dump(history, fh, indent=1)
+
+    if regressions:
+        print('{} case(s) slower than {:.2f}x their previous result'.format(len(regressions), args.fail_above))
+        return 1
+
+    return 0
+
+
+###############################################################
+def _environment():
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__}
+
+
+###############################################################
+def _load_history(path):
+
+    if not path.exists():
+        return []
+
+    with open(path) as fh:
+        return json.load(fh)
+
+
+###############################################################
+def _previous_results(history):
+    # latest result of each (case, backend, n) on this machine
+
+    previous = {}
+
+    for run in history:
+        if run.get('machine') != platform.node():
+            continue
+        for res in run['results']:
+            previous[(res['case'], res['backend'], res['n'])] = res
+
+    return previous
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,67 @@
 __version__ = "0.1.0"
 
-from .dmpmodel import *
+import importlib
 
-from .suffstats import *
+# The submodules are imported on first access to one of their names (PEP 562), so that
+# `import bug` does not pull in matplotlib, statsmodels, ruptures or scipy.optimize
+# until a function that needs them is used.
 
-from .jobrates import * 
+_EXPORTS = {
+    'dmpmodel': ['compute_beveridgean_unemployment', 'compute_matching_elasticity', 'compute_separation_efficacy',
+                 'compute_matching_efficacy', 'compute_endogenous_efficiency', 'compute_hosios_efficiency',
+                 'simulate_dmp_scenarios', 'DMPScenarios'],
 
-from .breakpoints import *
+    'suffstats': ['compute_unemployment_gap', 'compute_efficient_unemployment', 'compute_efficient_tightness',
+                  'compute_beveridge_inverse', 'compute_recruiting_inverse', 'compute_nonwork_inverse'],
 
-from .viz import *
+    'jobrates': ['compute_job_finding_rate', 'compute_job_separation_rate'],
 
+    'breakpoints': ['compute_beveridge_elasticity', 'compute_rolling_beveridge_elasticity', 'get_bp_breakpoints',
+                    'evaluate_num_breaks', 'BkpsEval'],
+
+    'viz': ['format_plot', 'plot_beveridge_elasticity_series', 'plot_beveridge_gap_series',
+            'plot_beveridge_curve_segments', 'plot_beveridge_curve_fits'],
+
+    'data': ['CACHE_VERSION', 'DATA_XLSX', 'HWI_INDEX', 'MONTHLY_COLUMNS', 'QUARTERLY_COLUMNS', 'get_cache_dir',
+             'load_monthly_data', 'load_quarterly_data', 'load_recession_dates', 'load_hwi_index', 'load_all',
+             'cached_frame', 'clear_cache'],
+
+    'fred': ['FRED_BASE_URL', 'fetch_fred_series', 'list_fred_vintages', 'load_fred_vintage'],
+
+    'splice': ['splice_series', 'monthly_to_quarterly', 'get_unemployment_rate', 'get_vacancy_rate', 'Splice'],
+
+    'pipeline': ['FLOW_COLUMNS', 'run_gap_pipeline', 'read_gap_inputs', 'load_cached_inputs', 'write_gap_result',
+                 'GapResult'],
+
+    'service': ['GapService', 'serve'],
+
+    'store': ['ResultsStore'],
+
+    'statespace': ['compute_statespace_beveridge_elasticity', 'kalman_filter_rw2', 'kalman_smoother_rw2'],
+
+    'figures': ['compute_figure_data', 'build_figures'],
+
+    'instrument': ['profile', 'enable_profiling', 'disable_profiling', 'Recorder'],
+}
+
+_SOURCE = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_SOURCE)
+
+
+def __getattr__(name):
+
+    if name in _SOURCE:
+        value = getattr(importlib.import_module('.' + _SOURCE[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    if name in _EXPORTS:
+        return importlib.import_module('.' + name, __name__)
+
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+
+    return sorted(set(globals()) | set(__all__) | set(_EXPORTS))
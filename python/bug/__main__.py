@@ -0,0 +1,276 @@
+'''
+Command-line entry point for headless runs:
+
+    python -m bug run inputs.csv [more.csv ...] --output-dir results --format parquet --jobs 4
+    python -m bug run --from-cache --efficiency --zeta 0.26 --kappa 0.92
+    python -m bug run --from-cache --efficiency --profile     # also writes a Chrome trace
+    python -m bug run vintages/*.csv --store results.sqlite --jobs 4
+    python -m bug vintages results.sqlite --period 2019Q4
+    python -m bug serve --port 8050 --workers 2
+    python -m bug figures --output-dir build/figures --jobs 4
+
+See `python -m bug <command> --help` for all the options.
+'''
+
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+
+###############################################################
+def main(argv=None):
+
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    return args.func(args)
+
+
+###############################################################
+def _build_parser():
+
+    parser = argparse.ArgumentParser(prog='python -m bug', description='Beveridgean unemployment gap.')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='compute breakpoints, Beveridge elasticity and unemployment gap')
+    run.add_argument('inputs', nargs='*', type=Path,
+                     help='CSV, Parquet or JSON files with columns u and v (and optionally u_level, '
+                          'ushort_level, h_level), indexed by month or quarter')
+    run.add_argument('--from-cache', action='store_true',
+                     help='use the 1951-2019 data of data.xlsx, through the local data cache')
+    run.add_argument('--min-size', type=int, default=None, help='min segment size (default: 15%% of the sample)')
+    run.add_argument('--n-bkps', type=int, default=None, help='number of breakpoints (default: 5)')
+    run.add_argument('--zeta', type=float, default=0.26, help='social value of nonwork (default: 0.26)')
+    run.add_argument('--kappa', type=float, default=0.92, help='recruiting cost (default: 0.92)')
+    run.add_argument('--efficiency', action='store_true', help='also compute the DMP efficiency variants')
+    run.add_argument('--r', type=float, default=0.012, help='discount rate for the Hosios condition')
+    run.add_argument('--backend', choices=['native', 'ruptures'], default='native')
+    run.add_argument('--output-dir', type=Path, default=Path('.'))
+    run.add_argument('--format', choices=['csv', 'parquet', 'json'], default='csv')
+    run.add_argument('--jobs', type=int, default=1, help='number of input files processed in parallel')
+    run.add_argument('--timings', type=Path, default=None, help='also write the timing report to this JSON file')
+    run.add_argument('--profile', action='store_true',
+                     help='also write a Chrome trace of each run (<output>.trace.json) and print its counters')
+    run.add_argument('--store', type=Path, default=None,
+                     help='also append the results to this SQLite results store (see bug.ResultsStore)')
+    run.add_argument('--vintage', default=None,
+                     help='vintage date of the inputs in the store (default: a date in the input file name, '
+                          'or today)')
+    run.set_defaults(func=_run)
+
+    serve = commands.add_parser('serve', help='run the local HTTP/JSON gap service')
+    serve.add_argument('--input', type=Path, default=None,
+                       help='input file as for run (default: the data of data.xlsx, through the data cache)')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8050)
+    serve.add_argument('--workers', type=int, default=2, help='number of processes for the estimations')
+    serve.set_defaults(func=_serve)
+
+    figures = commands.add_parser('figures', help='render the figures of the paper and their data tables')
+    figures.add_argument('names', nargs='*', help='figures to build, e.g. figure6 figure7B (default: all)')
+    figures.add_argument('--output-dir', type=Path, default=Path('build', 'figures'),
+                         help='writes <output-dir>/pdf/*.pdf and <output-dir>/xlsx/*.xlsx (default: %(default)s; '
+                              'figures/ holds the MATLAB output the tests compare against)')
+    figures.add_argument('--jobs', type=int, default=None, help='number of processes (default: number of CPUs)')
+    figures.add_argument('--force', action='store_true', help='rebuild the figures even if their inputs did not change')
+    figures.set_defaults(func=_figures)
+
+    vintages = commands.add_parser('vintages', help='query a results store written by run --store')
+    vintages.add_argument('store', type=Path)
+    vintages.add_argument('--period', default=None,
+                          help='print the value for this quarter in every vintage, e.g. 2022Q3 (default: the '
+                               'latest vintage of every quarter)')
+    vintages.add_argument('--variable', default='gap', help='stored column, e.g. gap, E, u_star (default: gap)')
+    vintages.add_argument('--min-size', type=int, default=None, help='only the runs with this min segment size')
+    vintages.add_argument('--n-bkps', type=int, default=None, help='only the runs with this number of breakpoints')
+    vintages.add_argument('--zeta', type=float, default=None, help='only the runs with this zeta')
+    vintages.add_argument('--kappa', type=float, default=None, help='only the runs with this kappa')
+    vintages.add_argument('--backend', choices=['native', 'ruptures'], default=None,
+                          help='only the runs with this backend')
+    vintages.set_defaults(func=_vintages)
+
+    return parser
+
+
+###############################################################
+def _run(args):
+
+    if not args.inputs and not args.from_cache:
+        print('error: give input files or --from-cache', file=sys.stderr)
+        return 2
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    options = {'min_size': args.min_size, 'n_bkps': args.n_bkps, 'zeta': args.zeta, 'kappa': args.kappa,
+               'efficiency': args.efficiency, 'r': args.r, 'backend': args.backend}
+
+    sources = ([None] if args.from_cache else []) + list(args.inputs)
+    outputs = _output_paths(sources, args)
+
+    store = None if args.store is None else str(args.store)
+
+    tasks = [(None if p is None else str(p), str(out), args.format, options, args.profile, store,
+              args.vintage or _vintage_from_name(p))
+             for p, out in zip(sources, outputs)]
+
+    t0 = time.perf_counter()
+
+    if args.jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            reports = list(pool.map(_run_one, tasks))
+    else:
+        reports = [_run_one(task) for task in tasks]
+
+    total = time.perf_counter() - t0
+
+    _print_report(reports, total)
+
+    if args.timings is not None:
+        with open(args.timings, 'w') as fh:
+            json.dump({'total': total, 'runs': reports}, fh, indent=1)
+
+    return 0
+
+
+###############################################################
+def _serve(args):
+
+    from .pipeline import read_gap_inputs
+    from .service import serve
+
+    serve(None if args.input is None else read_gap_inputs(args.input), host=args.host, port=args.port,
+          workers=args.workers)
+
+    return 0
+
+
+###############################################################
+def _figures(args):
+
+    from .figures import build_figures
+
+    t0 = time.perf_counter()
+    status = build_figures(args.output_dir, names=args.names or None, jobs=args.jobs, force=args.force)
+
+    built = sorted(name for name, s in status.items() if s == 'built')
+    print('built {} of {} outputs in {:.1f} s{}'.format(len(built), len(status), time.perf_counter() - t0,
+                                                        ': ' + ', '.join(built) if built else ''))
+
+    return 0
+
+
+###############################################################
+def _vintages(args):
+
+    from .store import ResultsStore
+
+    if not args.store.exists():
+        print('error: no results store at {}'.format(args.store), file=sys.stderr)
+        return 2
+
+    params = {k: getattr(args, k) for k in ('min_size', 'n_bkps', 'zeta', 'kappa', 'backend')
+              if getattr(args, k) is not None}
+
+    with ResultsStore(args.store) as store:
+        try:
+            if args.period is None:
+                out = store.latest(args.variable, params=params)
+            else:
+                out = store.vintages(args.period, args.variable, params=params)
+        except ValueError as err:
+            print('error: {}'.format(err), file=sys.stderr)
+            return 2
+
+    print(out.to_string())
+
+    return 0
+
+
+###############################################################
+def _run_one(task):
+    # runs in a worker process when --jobs > 1
+
+    from .instrument import profile
+    from .pipeline import load_cached_inputs, read_gap_inputs, run_gap_pipeline, write_gap_result
+    from .store import ResultsStore
+
+    source, output, fmt, options, trace, store, vintage = task
+
+    with profile() if trace else nullcontext() as rec:
+        t0 = time.perf_counter()
+        inputs = load_cached_inputs() if source is None else read_gap_inputs(source)
+        t_load = time.perf_counter() - t0
+
+        result = run_gap_pipeline(inputs, **options)
+
+        t0 = time.perf_counter()
+        write_gap_result(result, output, fmt)
+        t_write = time.perf_counter() - t0
+
+        if store is not None:
+            t0 = time.perf_counter()
+            with ResultsStore(store) as results_store:
+                results_store.append(result, vintage=vintage, source=source or 'data cache')
+            t_store = time.perf_counter() - t0
+
+    timings = dict({'load': t_load}, **result.timings, write=t_write)
+    if store is not None:
+        timings['store'] = t_store
+
+    report = {'input': source or 'data cache', 'output': output, 'breaks': [str(b) for b in result.breaks],
+              'timings': timings}
+
+    if rec is not None:
+        rec.to_chrome_trace(output + '.trace.json')
+        report['counters'] = dict(rec.counters)
+
+    return report
+
+
+###############################################################
+def _vintage_from_name(path):
+    # vintage date in an input file name, e.g. inputs_2023-05-05.csv or 20230505.csv
+
+    if path is None:
+        return None
+
+    match = re.search(r'(\d{4})-?(\d{2})-?(\d{2})', path.stem)
+
+    return None if match is None else '-'.join(match.groups())
+
+
+###############################################################
+def _output_paths(sources, args):
+    # <stem>.gap.<format>, or <name>.gap.<format> when inputs share a stem
+
+    stems = ['data_xlsx' if p is None else p.stem for p in sources]
+    names = [stem if stems.count(stem) == 1 else p.name for p, stem in zip(sources, stems)]
+
+    return [args.output_dir / '{}.gap.{}'.format(name, args.format) for name in names]
+
+
+###############################################################
+def _print_report(reports, total):
+
+    for rep in reports:
+        print('{} -> {}'.format(rep['input'], rep['output']))
+        print('  breaks: ' + ', '.join(rep['breaks']))
+        for stage, seconds in rep['timings'].items():
+            print('  {:<24}{:>10.1f} ms'.format(stage, 1000*seconds))
+        for name, value in rep.get('counters', {}).items():
+            print('  {:<24}{:>10}'.format(name, value))
+
+    print('total{:>29.1f} ms'.format(1000*total))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,22 @@
 import numpy as np
 import pandas as pd
-import ruptures as rpt
-import statsmodels.api as sm
-from scipy.stats import f
+
+from . import instrument
+from .instrument import instrumented, count, stage
+
+# ruptures, statsmodels and scipy.stats are imported where they are used: they are
+# only needed by the reference backends, and are slow to import
 
 
 ###########################################################
 def _calc_hac_lag(seq_len):
+    if np.ndim(seq_len):
+        return np.maximum(2, ((0.15*np.asarray(seq_len))**(.25)).astype(int))
     return max(2,int( (0.15*seq_len)**(.25)))
 
 ###############################################################
-def compute_beveridge_elasticity(log_u, log_v, bkps_in=None):
+@instrumented
+def compute_beveridge_elasticity(log_u, log_v, bkps_in=None, backend='statsmodels'):
     '''
     This function computes beveridge elasticity using the log unemployment rate u 
     and log vacancy rate v. Elasticity is the estimated regression coefficient in 
@@ -26,6 +32,11 @@ def compute_beveridge_elasticity(log_u, log_v, bkps_in=None):
         The other option is to run a breakpoint estimation outside of this function and 
         feed this in. If bkps_in is specified, this will suppress the estimation with 
         the Bai-Perron method.
+    backend: str, optional
+        'statsmodels' (default) fits the segments with statsmodels OLS. 'native' uses
+        the numpy implementation of the same OLS and HAC standard errors, and the native 
+        breakpoint detection if bkps_in is not specified, so that neither statsmodels 
+        nor ruptures are needed.
     
     
     Returns
@@ -36,8 +47,12 @@ def compute_beveridge_elasticity(log_u, log_v, bkps_in=None):
         coeffs: list of tuples of linear regression coeffs for the fit of each segment
     '''
          
+    if backend not in ('statsmodels', 'native'):
+        raise ValueError("backend must be 'statsmodels' or 'native'.")
+
     if bkps_in is None:
-        est_bkps = get_bp_breakpoints(log_u, log_v, use_bp_defaults=True)
+        est_bkps = get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, 
+                                      backend='native' if backend == 'native' else 'ruptures')
             
     else:
         est_bkps = bkps_in
@@ -57,12 +72,23 @@ def compute_beveridge_elasticity(log_u, log_v, bkps_in=None):
     # see Cheung & Lai (1997) for nice discussion on N-W vs Andrews HAC
     
     coeffs = []  
+    
+    if backend == 'statsmodels':
+        import statsmodels.api as sm
       
     for idx, b in enumerate(est_bkps[:-1]):
  
         seq_len = est_bkps[idx+1] - est_bkps[idx]
+        
+        if backend == 'native':
+            params, bse, _, _ = _ols_hac(y[est_bkps[idx]:est_bkps[idx+1]], X[est_bkps[idx]:est_bkps[idx+1],:], 
+                                         _calc_hac_lag(seq_len))
+            coeffs.append((- params[0], bse[0], params[1]))
+            continue
+            
         model = sm.OLS(y[est_bkps[idx]:est_bkps[idx+1]], X[est_bkps[idx]:est_bkps[idx+1],:]) 
         results = model.fit(cov_type='HAC', cov_kwds={'maxlags':_calc_hac_lag(seq_len), 'use_correction': True}, use_t=True)
+        count('ols_fits')
         coeffs.append((- results.params[0], results.bse[0], results.params[1]))
 
         
@@ -77,10 +103,92 @@ def compute_beveridge_elasticity(log_u, log_v, bkps_in=None):
 
     return bev_e.astype(float), coeffs
 
+
+###############################################################
+@instrumented
+def compute_rolling_beveridge_elasticity(log_u, log_v, window=None, min_periods=None, maxlags=None, full_output=False):
+    '''
+    This function computes a time-varying Beveridge elasticity from rolling (or expanding) 
+    regressions of the log vacancy rate on the log unemployment rate. The elasticity at 
+    date t is estimated on the window ending at t, with the same OLS fit and Newey-West 
+    HAC standard errors as compute_beveridge_elasticity. All the windows are computed 
+    from cumulative sums of the data, in O(T) per window length.
+    
+    Parameters
+    -----------
+    log_u: pd.Series
+        Log unemployment rate.
+    log_v: pd.Series
+        Log vacancy rate.
+    window: int, list of int or None, optional
+        Length of the rolling window, or several lengths. None (default) gives the 
+        expanding window, from the start of the sample.
+    min_periods: int, optional
+        Min number of observations of a window; shorter windows at the start of the 
+        sample are used down to this length. Default is the window length, or 20 for 
+        the expanding window.
+    maxlags: int, optional
+        Lag of the HAC estimator. Default is the rule of thumb of compute_beveridge_elasticity, 
+        applied to the length of each window.
+    full_output: bool, optional
+        Whether to also return the intercept and the sum of squared residuals (SSR) of 
+        the regression on each window, as the columns intercept and SSR. Default False.
+    
+    Returns
+    --------
+    pd.DataFrame
+        bev_e: beveridge elasticity and 95% CI estimates as time series, with columns 
+        E, SE, LB, UB as in compute_beveridge_elasticity (nan where the window is too
+        short or holds missing values), and intercept, SSR if full_output. A dict of 
+        such frames, keyed by window length, if window is a list.
+    '''
+    
+    windows = list(window) if isinstance(window, (list, tuple, np.ndarray)) else [window]
+    
+    x, y = np.asarray(log_u, dtype=float), np.asarray(log_v, dtype=float)
+    t = len(y)
+    
+    if len(x) != t:
+        raise ValueError('log_u and log_v must have the same length.')
+        
+    if any(w is not None and w < 3 for w in windows):
+        raise ValueError('window must be at least 3.')
+        
+    longest = t if None in windows else min(max(windows), t)
+    moments = _RollingMoments(x, y, _calc_hac_lag(longest) if maxlags is None else maxlags)
+    
+    out = {}
+    
+    for w in windows:
+        
+        min_obs = (20 if w is None else w) if min_periods is None else min_periods
+        min_obs = max(min_obs, 3)
+        
+        ends = np.arange(1, t+1)
+        starts = np.zeros(t, dtype=int) if w is None else np.maximum(ends - w, 0)
+        lags = _calc_hac_lag(ends - starts) if maxlags is None else np.full(t, maxlags)
+        
+        params, bse, ssr = moments.fit(starts, ends, lags)
+        
+        # the elasticity is minus the slope, as in compute_beveridge_elasticity
+        e, se = - params[:, 1], bse[:, 1]
+        e[ends - starts < min_obs] = np.nan
+        se[np.isnan(e)] = np.nan
+        
+        out[w] = pd.DataFrame({'E': e, 'SE': se, 'LB': e - 1.96*se, 'UB': e + 1.96*se}, 
+                              index=getattr(log_v, 'index', None))
+        
+        if full_output:
+            out[w]['intercept'] = np.where(np.isnan(e), np.nan, params[:, 0])
+            out[w]['SSR'] = np.where(np.isnan(e), np.nan, ssr)
+        
+    return out if isinstance(window, (list, tuple, np.ndarray)) else out[window]
+
     
     
 ###############################################################
-def get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, min_size=None, n_bkps=None):
+@instrumented
+def get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, min_size=None, n_bkps=None, backend='ruptures'):
     '''
     This function calls the dynamic programming method with linear 
     cost functions from the python ruptures package to calculate 
@@ -100,6 +208,10 @@ def get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, min_size=None, n_bkps
         Must be specified if use_bp_defaults=False.
     n_bkps: int, optional
         Must be specified if use_bp_defaults=False.
+    backend: str, optional
+        'ruptures' (default) uses the rpt.Dynp algorithm. 'native' solves the same dynamic 
+        program with segment costs computed from cumulative sums, which is much faster 
+        and does not need ruptures.
         
         
     Returns
@@ -119,6 +231,9 @@ def get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, min_size=None, n_bkps
     if not use_bp_defaults:
         if min_size is None or n_bkps is None:
             raise ValueError('Must input min_size and n_bkps parameters if use_bp_defaults=False.')
+            
+    if backend not in ('ruptures', 'native'):
+        raise ValueError("backend must be 'ruptures' or 'native'.")
     
     # check there are no NaNs at the end of the data:
     last_index = min(log_u.last_valid_index(), log_v.last_valid_index())
@@ -142,40 +257,58 @@ def get_bp_breakpoints(log_u, log_v, use_bp_defaults=True, min_size=None, n_bkps
         n_bkps = 5
 
 
+    if backend == 'native':
+        with stage('dynp'):
+            return _dynp(_SegmentCost(signal), n_bkps, min_size)[n_bkps]
+        
+    import ruptures as rpt
+
     # call the dynamic programming algo
-    fit = rpt.Dynp(model='linear', min_size=min_size, jump=1).fit(signal)
+    with stage('dynp'):
+        fit = rpt.Dynp(model='linear', min_size=min_size, jump=1).fit(signal)
         
-    est_bkps = fit.predict(n_bkps=n_bkps)
+        est_bkps = fit.predict(n_bkps=n_bkps)
     est_bkps.insert(0,0)  
     
+    # the memoized subproblems of the recursion, cleared by fit; cache_info is
+    # only read when profiling
+    if instrument._RECORDER is not None:
+        count('dp_cells', rpt.Dynp.seg.cache_info().misses)
+    
     return est_bkps
         
     
 ###############################################################
-def evaluate_num_breaks(signal, max_bkps, min_size=4,):
+@instrumented
+def evaluate_num_breaks(signal, max_bkps, min_size=4, backend='ruptures'):
 
     
     t = signal.shape[0]
-    q = signal.shape[1]-1
+    
+    if backend == 'native':
+        return _evaluate_num_breaks_native(signal, max_bkps, min_size)
+    elif backend != 'ruptures':
+        raise ValueError("backend must be 'ruptures' or 'native'.")
+        
+    import ruptures as rpt
+    import statsmodels.api as sm
     
     # null model: zero breaks
     model = sm.OLS(signal[:,0], signal[:,1:]) 
     results = model.fit(cov_type='HAC', cov_kwds={'maxlags':_calc_hac_lag(t), 'use_correction': True}, use_t=True)
+    count('ols_fits')
     
     # start lists with first element the result for zero breaks model
     ssr = [results.ssr]
-    fits = [results.fittedvalues]
-    bic = [ _bic(0, ssr[0], q, t, use_lwz=False) ]
-    lwz = [ _bic(0, ssr[0], q, t, use_lwz=True) ]
-    fstat_zero = [ None ]
-    fstat_run = [ None ]    
+    params = [[results.params]]
     
 
     # set up the breakpoint detection
     # call the dynamic programming algo
-    fit = rpt.Dynp(model='linear', min_size=min_size, jump=1).fit(signal)
+    with stage('dynp'):
+        fit = rpt.Dynp(model='linear', min_size=min_size, jump=1).fit(signal)
         
-    _ = fit.predict(max_bkps)
+        _ = fit.predict(max_bkps)
     
     bps_list=[ [0,signal.shape[0]] ]
     
@@ -187,7 +320,7 @@ def evaluate_num_breaks(signal, max_bkps, min_size=4,):
         bps_list.append(bkps)
         
         ssr_tmp = 0  
-        fits_tmp = []
+        params_tmp = []
         
         for idx, b in enumerate(bkps[:-1]):
             # iterate over the segments of the model with m breaks, add up the ssr piece-wise
@@ -195,26 +328,47 @@ def evaluate_num_breaks(signal, max_bkps, min_size=4,):
             
             results = model.fit(cov_type='HAC', cov_kwds={'maxlags':_calc_hac_lag(bkps[idx+1]-bkps[idx]), 
                                                           'use_correction': True}, use_t=True)
+            count('ols_fits')
             
             # add the ssr for the segment
             ssr_tmp += results.ssr
-            fits_tmp.append(results.fittedvalues)
+            params_tmp.append(results.params)
                 
             
         # append results to lists    
         ssr.append(ssr_tmp)
-        fits.append(fits_tmp)
+        params.append(params_tmp)
         
-        bic.append( _bic(m, ssr_tmp, q, t) ) 
-        lwz.append( _bic(m, ssr_tmp, q, t, use_lwz=True) )
+    if instrument._RECORDER is not None:
+        count('dp_cells', rpt.Dynp.seg.cache_info().misses)
+    
+    return BkpsEval.from_fits(signal, bps_list, ssr, params, min_size)
 
-        fstat_zero.append( _f_test(ssr[0], ssr_tmp, 0, m, q+1, t) )
-        fstat_run.append( _f_test(ssr[m-1], ssr_tmp, m-1, m, q+1, t)  )
-        
+
+########################################
+def _evaluate_num_breaks_native(signal, max_bkps, min_size):
+    # same as evaluate_num_breaks, with all the breakpoint sets from a single
+    # pass of the native dynamic program, and numpy OLS fits
+
+    with stage('dynp'):
+        bps_list = _dynp(_SegmentCost(signal), max_bkps, min_size)
+    
+    ssr, params = [], []
     
-    return BkpsEval(bic=bic, lwz=lwz, ssr=ssr, bkps=bps_list, fitted_values=fits, 
-                    f_stats_zero_v_m=fstat_zero, f_stats_running=fstat_run,
-                    min_size=min_size, size=t, max_bkps=max_bkps)
+    for m, bkps in enumerate(bps_list):
+    
+        ssr_tmp = 0
+        params_tmp = []
+        
+        for idx, b in enumerate(bkps[:-1]):
+            seg_params, _, seg_ssr, _ = _ols_hac(signal[bkps[idx]:bkps[idx+1],0], signal[bkps[idx]:bkps[idx+1],1:], None)
+            ssr_tmp += seg_ssr
+            params_tmp.append(seg_params)
+            
+        ssr.append(ssr_tmp)
+        params.append(params_tmp)
+            
+    return BkpsEval.from_fits(signal, bps_list, ssr, params, min_size)
 
 
 
@@ -234,6 +388,8 @@ def _bic(m, ssr, q, t, use_lwz=False):
 def _f_test(ssr_null, ssr_alt, n, m, k, t):
     ''' A Chow type F test for structural breaks'''
     
+    from scipy.stats import f
+    
     df2 = t-(m+1)*2*k
     F = ((ssr_null-ssr_alt)/k)/(ssr_alt/df2)
     
@@ -243,46 +399,413 @@ def _f_test(ssr_null, ssr_alt, n, m, k, t):
     return {'F':F, 'pval':p, 'null':n, 'alt':m}
     
     
+###############################################
+def _ols_hac(y, X, maxlags):
+    # numpy OLS, with the Newey-West HAC standard errors computed by statsmodels 
+    # for cov_type='HAC' with Bartlett weights and use_correction=True
+    # returns params, bse (None if maxlags is None), ssr and fitted values
+
+    count('ols_fits')
+
+    params, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    fitted = X @ params
+    resid = y - fitted
+    ssr = resid @ resid
+    
+    if maxlags is None:
+        return params, None, ssr, fitted
+        
+    n, k = X.shape
+    xu = X * resid[:, None]
+    
+    S = xu.T @ xu
+    for lag in range(1, maxlags+1):
+        s = xu[lag:].T @ xu[:-lag]
+        S += (1. - lag/(maxlags+1.)) * (s + s.T)
+    
+    H = np.linalg.pinv(X.T @ X)
+    cov = H @ S @ H * n/(n-k)
+    
+    return params, np.sqrt(np.diag(cov)), ssr, fitted
+    
+
+###############################################
+class _SegmentCost():
+    '''
+    Sum of squared residuals of the linear regression of signal[:,0] on signal[:,1:]
+    over any segment [start, end), from cumulative sums of the cross-products. The
+    same cost as the ruptures 'linear' model, in O(1) per segment instead of a 
+    least-squares fit.
+    '''
+    
+    def __init__(self, signal):
+    
+        signal = np.asarray(signal, dtype=float)
+        y, X = signal[:,0], signal[:,1:]
+        
+        # with a constant regressor, the ssr does not change when the other 
+        # columns are demeaned, which keeps the cumulative sums well conditioned
+        const = np.all(X == X[:1], axis=0) & (X[0] != 0)
+        if const.any():
+            y = y - y.mean()
+            X = np.where(const, X, X - X.mean(axis=0))
+            
+        self.n_samples, self.k = X.shape
+        
+        zero = lambda a: np.concatenate([np.zeros((1,) + a.shape[1:]), a])
+        self._xx = zero(np.cumsum(X[:, :, None] * X[:, None, :], axis=0))
+        self._xy = zero(np.cumsum(X * y[:, None], axis=0))
+        self._yy = zero(np.cumsum(y * y))
+        
+    def ssr(self, starts, end):
+        # ssr of the segments [s, end) for all s in starts (array)
+    
+        xx = self._xx[end] - self._xx[starts]
+        xy = self._xy[end] - self._xy[starts]
+        yy = self._yy[end] - self._yy[starts]
+        
+        if self.k == 2:
+            det = xx[:,0,0]*xx[:,1,1] - xx[:,0,1]*xx[:,1,0]
+            fit = (xx[:,1,1]*xy[:,0]**2 - 2.*xx[:,0,1]*xy[:,0]*xy[:,1] + xx[:,0,0]*xy[:,1]**2)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ssr = yy - fit/det
+            
+            # like the least-squares solver, rank deficient segments have no residual
+            singular = np.abs(det) <= 1e-12 * np.abs(xx[:,0,0]*xx[:,1,1])
+        else:
+            sign, _ = np.linalg.slogdet(xx)
+            singular = sign <= 0
+            xx[singular] = np.eye(self.k)
+            ssr = yy - np.einsum('ij,ij->i', xy, np.linalg.solve(xx, xy[:,:,None])[:,:,0])
+            
+        ssr[singular] = 0.
+        
+        return np.maximum(ssr, 0.)
+        
+        
+###############################################
+class _RollingMoments():
+    '''
+    OLS fits of y on (1, x) with Newey-West HAC standard errors over any windows 
+    [start, end), from cumulative sums. With z_t = (1, x_t, y_t) and the residual 
+    u_t = c.z_t, c = (-a, -b, 1), the HAC terms sum_t x_t u_t x_{t-l}' u_{t-l} are 
+    quadratic forms in c of the window sums of (x_t z_t') (x_{t-l} z_{t-l}'), which 
+    are stored as cumulative sums for each lag l up to maxlags. The SSR is the same 
+    quadratic form of the window sum of z_t z_t'.
+    '''
+    
+    def __init__(self, x, y, maxlags):
+    
+        # the residuals do not change when x and y are shifted, and the 
+        # demeaned data keep the cumulative sums well conditioned
+        valid = np.isfinite(x) & np.isfinite(y)
+        self._means = (x[valid].mean(), y[valid].mean()) if valid.any() else (0., 0.)
+        x = np.where(valid, x - self._means[0], 0.)
+        y = np.where(valid, y - self._means[1], 0.)
+        
+        z = np.column_stack((valid.astype(float), x, y))
+        t = len(z)
+        
+        cumsum = lambda a: np.concatenate([np.zeros((1,) + a.shape[1:]), np.cumsum(a, axis=0)])
+        
+        self._invalid = cumsum((~valid).astype(float))
+        self._zz = cumsum(z[:, :, None] * z[:, None, :])
+        
+        # xz[t, i, p] = x_{t,i} z_{t,p}, i over the regressors (1, x)
+        xz = z[:, :2, None] * z[:, None, :]
+        self._lagged = []
+        for lag in range(maxlags+1):
+            q = np.zeros((t, 2, 3, 2, 3))
+            q[lag:] = xz[lag:, :, :, None, None] * xz[:t-lag, None, None, :, :]
+            self._lagged.append(cumsum(q))
+            
+    def fit(self, starts, ends, lags):
+        # params (a, b), their HAC standard errors and the SSR, nan for windows with 
+        # missing values; the intercept a is that of the original data
+        
+        n = (ends - starts).astype(float)
+        zz = self._zz[ends] - self._zz[starts]
+        
+        xx, xy = zz[:, :2, :2], zz[:, :2, 2]
+        det = xx[:, 0, 0]*xx[:, 1, 1] - xx[:, 0, 1]**2
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            H = np.stack([np.stack([xx[:, 1, 1], -xx[:, 0, 1]], -1), 
+                          np.stack([-xx[:, 1, 0], xx[:, 0, 0]], -1)], -2) / det[:, None, None]
+            params = np.einsum('wij,wj->wi', H, xy)
+            
+            c = np.column_stack((-params, np.ones(len(n))))
+            
+            S = np.zeros((len(n), 2, 2))
+            for lag, cum in enumerate(self._lagged):
+                weight = np.where(lag <= lags, 1. - lag/(lags+1.), 0.)
+                if not weight.any():
+                    continue
+                m = cum[ends] - cum[np.minimum(starts + lag, ends)]
+                m = np.einsum('wipjq,wp,wq->wij', m, c, c)
+                S += m * weight[:, None, None] if lag == 0 else (m + m.transpose(0, 2, 1)) * weight[:, None, None]
+                
+            cov = H @ S @ H * (n / (n - 2.))[:, None, None]
+            bse = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+            
+        ssr = np.maximum(np.einsum('wpq,wp,wq->w', zz, c, c), 0.)
+        # y - ybar = a + b (x - xbar)
+        params[:, 0] += self._means[1] - params[:, 1]*self._means[0]
+        
+        bad = (self._invalid[ends] - self._invalid[starts] > 0) | (n < 3) | ~(np.abs(det) > 0)
+        params[bad], bse[bad], ssr[bad] = np.nan, np.nan, np.nan
+        
+        return params, bse, ssr
+        
+        
+###############################################
+def _dynp(cost, max_bkps, min_size):
+    # optimal partitions for 0 to max_bkps breakpoints, with segments of at least
+    # min_size, solving the same dynamic program as ruptures rpt.Dynp (with jump=1) 
+    # in one pass over the segment ends
+    # returns list of breakpoint lists starting with 0 and ending with n_samples
+    
+    t = cost.n_samples
+    # ruptures never allows segments shorter than the 2 points of its linear cost
+    min_size = max(min_size, 2)
+    
+    if (max_bkps+1)*min_size > t:
+        raise ValueError('Not enough observations for {} breakpoints with min_size={}.'.format(max_bkps, min_size))
+    
+    # best[j, e]: min ssr of signal[:e] with j breakpoints; arg[j, e]: its last breakpoint
+    best = np.full((max_bkps+1, t+1), np.inf)
+    arg = np.zeros((max_bkps+1, t+1), dtype=int)
+    
+    for e in range(min_size, t+1):
+    
+        starts = np.arange(0, e-min_size+1)
+        c = cost.ssr(starts, e)
+        
+        best[0, e] = c[0]
+        
+        for j in range(1, max_bkps+1):
+            total = best[j-1, starts] + c
+            s = np.argmin(total)
+            best[j, e] = total[s]
+            arg[j, e] = s
+            
+    # subproblems solved, and segment costs evaluated for them
+    count('dp_cells', (max_bkps+1)*(t-min_size+1))
+    count('segment_costs', (t-min_size+1)*(t-min_size+2)//2)
+            
+    bps_list = []
+    
+    for m in range(max_bkps+1):
+        bkps = [t]
+        for j in range(m, 0, -1):
+            bkps.insert(0, int(arg[j, bkps[0]]))
+        bkps.insert(0, 0)
+        bps_list.append(bkps)
+        
+    return bps_list
+    
+    
 ###############################################
 class BkpsEval():
     """
-    Class to hold results from breakpoint evaluations
+    Class to hold results from breakpoint evaluations, in NumPy arrays indexed by 
+    the number of breakpoints m = 0, ..., max_bkps. The fitted values are computed 
+    on demand from the segment coefficients. Save with save(path), load with 
+    BkpsEval.load(path), which maps the arrays of the file without copying them.
 
     Attributes
     ----------
-    bic: list of float
+    breaks: np.ndarray of int, shape (max_bkps+1, max_bkps+2)
+        Row m holds the breakpoint indices 0, b_1, ..., b_m, size, padded with -1.
+    ssr_values: np.ndarray
+        Sum of squared residuals.
+    bic_values: np.ndarray
         BIC information criterion.
-    lwz: list of float
-        Liu, Wu and Zidek (1994) modified information criterion.       
-    ssr: list of float
-        Sum of squared residuals.       
-    bkps: list of lists
-        Lists of breakpoint indicies. 
-    max_bkps: int
-        Max number of breakpoints considered.
+    lwz_values: np.ndarray
+        Liu, Wu and Zidek (1994) modified information criterion.
+    f_zero, pval_zero: np.ndarray
+        F statistic and p-value of the test of 0 against m breaks (nan for m=0).
+    f_running, pval_running: np.ndarray
+        F statistic and p-value of the test of m-1 against m breaks (nan for m=0).
+    coeffs: np.ndarray, shape (max_bkps+1, max_bkps+1, k)
+        coeffs[m, i]: OLS coefficients of segment i in the model with m breaks, 
+        padded with nan.
+    regressors: np.ndarray, shape (size, k)
+        Regressors of the OLS fits, signal[:,1:].
     min_size: int
-        Min size allowed for sub-sequences.  
-    size: int
-        Length of the total sequence.  
-    fitted_values: list of lists
-        The piece-wise fitted values from the OLS fits.    
-    f_stats_zero_v_m: list of tuples    
-    f_stats_running: list of tuples
-        
+        Min size allowed for sub-sequences.
+
+    The attributes of earlier versions are kept as properties: bic, lwz, ssr, bkps 
+    (lists), max_bkps, size, fitted_values (list of arrays for each m, a single array 
+    for m=0), f_stats_zero_v_m and f_stats_running (lists of dicts, None for m=0).
     """ 
     
-    def __init__(self, bic, lwz, ssr, bkps, max_bkps, min_size, size, 
-                fitted_values, f_stats_zero_v_m, f_stats_running):
+    __slots__ = ('breaks', 'ssr_values', 'bic_values', 'lwz_values', 'f_zero', 'pval_zero', 
+                 'f_running', 'pval_running', 'coeffs', 'regressors', 'min_size')
+    
+    _ARRAYS = __slots__[:-1]
+    
+    def __init__(self, breaks, ssr_values, bic_values, lwz_values, f_zero, pval_zero, f_running, 
+                 pval_running, coeffs, regressors, min_size):
 
-        self.bic = bic
-        self.lwz = lwz   
-        self.ssr = ssr
-        self.bkps = bkps
-        self.max_bkps = max_bkps        
-        self.min_size = min_size
-        self.size = size
-        self.fitted_values = fitted_values
-        self.f_stats_zero_v_m = f_stats_zero_v_m
-        self.f_stats_running = f_stats_running
+        self.breaks = np.asarray(breaks)
+        self.ssr_values = np.asarray(ssr_values)
+        self.bic_values = np.asarray(bic_values)
+        self.lwz_values = np.asarray(lwz_values)
+        self.f_zero = np.asarray(f_zero)
+        self.pval_zero = np.asarray(pval_zero)
+        self.f_running = np.asarray(f_running)
+        self.pval_running = np.asarray(pval_running)
+        self.coeffs = np.asarray(coeffs)
+        self.regressors = np.asarray(regressors)
+        self.min_size = int(min_size)
         
-
+    @classmethod
+    def from_fits(cls, signal, bps_list, ssr, params, min_size):
+        # from the breakpoints, ssr and segment coefficients for m = 0, ..., max_bkps
+        
+        t, k = signal.shape[0], signal.shape[1]-1
+        max_bkps = len(bps_list) - 1
+        m = np.arange(max_bkps+1)
+        ssr = np.asarray(ssr, dtype=float)
+        
+        breaks = np.full((max_bkps+1, max_bkps+2), -1, dtype=np.int64)
+        coeffs = np.full((max_bkps+1, max_bkps+1, k), np.nan)
+        for j, bkps in enumerate(bps_list):
+            breaks[j, :len(bkps)] = bkps
+            coeffs[j, :len(params[j])] = params[j]
+            
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zero = _f_test(ssr[0], ssr, 0, m, k+1, t)
+            running = _f_test(np.r_[np.nan, ssr[:-1]], ssr, m-1, m, k+1, t)
+            
+        nan_at_zero = lambda a: np.where(m > 0, a, np.nan)
+            
+        return cls(breaks=breaks, ssr_values=ssr, bic_values=_bic(m, ssr, k, t), 
+                   lwz_values=_bic(m, ssr, k, t, use_lwz=True), 
+                   f_zero=nan_at_zero(zero['F']), pval_zero=nan_at_zero(zero['pval']),
+                   f_running=nan_at_zero(running['F']), pval_running=nan_at_zero(running['pval']),
+                   coeffs=coeffs, regressors=np.array(signal[:,1:], dtype=float), min_size=min_size)
+        
+    @property
+    def max_bkps(self):
+        return self.breaks.shape[0] - 1
+        
+    @property
+    def size(self):
+        return self.regressors.shape[0]
+        
+    @property
+    def bic(self):
+        return self.bic_values.tolist()
+        
+    @property
+    def lwz(self):
+        return self.lwz_values.tolist()
+        
+    @property
+    def ssr(self):
+        return self.ssr_values.tolist()
+        
+    @property
+    def bkps(self):
+        return [self.get_bkps(m) for m in range(self.max_bkps+1)]
+        
+    @property
+    def f_stats_zero_v_m(self):
+        return [None] + [{'F': self.f_zero[m], 'pval': self.pval_zero[m], 'null': 0, 'alt': m} 
+                         for m in range(1, self.max_bkps+1)]
+        
+    @property
+    def f_stats_running(self):
+        return [None] + [{'F': self.f_running[m], 'pval': self.pval_running[m], 'null': m-1, 'alt': m} 
+                         for m in range(1, self.max_bkps+1)]
+        
+    @property
+    def fitted_values(self):
+        fits = [self.segment_fits(m) for m in range(self.max_bkps+1)]
+        fits[0] = fits[0][0]
+        return fits
+        
+    def get_bkps(self, m):
+        '''Breakpoints of the model with m breaks, starting with 0 and ending with size.'''
+        return self.breaks[m, :m+2].tolist()
+        
+    def segment_fits(self, m):
+        '''List of the fitted values of each segment of the model with m breaks.'''
+        bkps = self.breaks[m, :m+2]
+        return [self.regressors[bkps[i]:bkps[i+1]] @ self.coeffs[m, i] for i in range(m+1)]
+        
+    def fitted(self, m):
+        '''Fitted values of the model with m breaks, as a single array.'''
+        return np.concatenate(self.segment_fits(m))
+        
+    def save(self, path):
+        '''
+        Save the arrays to an uncompressed .npz file, at path as given (np.savez would
+        add a .npz suffix to a path without one, which load would then not find).
+        '''
+        with open(path, 'wb') as fh:
+            np.savez(fh, min_size=np.int64(self.min_size), **{a: getattr(self, a) for a in self._ARRAYS})
+        
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''
+        Load from a .npz file written by save. With mmap=True, the arrays are read-only
+        memory maps of the file, without copies.
+        '''
+        arrays = _map_npz(path) if mmap else None
+        
+        if arrays is None:
+            with np.load(path) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+                
+        return cls(min_size=int(arrays.pop('min_size')), **arrays)
+        
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, a) for a in self.__slots__))
+        
+    def __repr__(self):
+        return 'BkpsEval(size={}, max_bkps={}, min_size={})'.format(self.size, self.max_bkps, self.min_size)
+        
+        
+###############################################
+def _map_npz(path):
+    # arrays of an uncompressed .npz file as memory maps at their offsets in 
+    # the zip file; None if a member is compressed
+    
+    import struct
+    import zipfile
+    
+    arrays = {}
+    
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as fh:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+                
+            # the member data follow its local header, of variable length
+            fh.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', fh.read(4))
+            fh.seek(info.header_offset + 30 + name_len + extra_len)
+            
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+                
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            
+            if dtype.hasobject:
+                return None
+            if shape == ():
+                arrays[name] = np.frombuffer(fh.read(dtype.itemsize), dtype=dtype).reshape(())
+            elif int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=fh.tell(), shape=shape,
+                                         order='F' if fortran else 'C')
+                
+    return arrays
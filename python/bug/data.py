@@ -0,0 +1,491 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented, stage
+
+## functions:
+
+### sources: load_monthly_data, load_quarterly_data, load_recession_dates, load_hwi_index, load_all
+### cache: cached_frame, get_cache_dir, clear_cache
+
+
+# bump this whenever the on-disk layout or the parsing of a source changes,
+# so that stale caches written by an older version are rebuilt
+CACHE_VERSION = 1
+
+_PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+DATA_XLSX = _PACKAGE_ROOT.parent / 'code' / 'data.xlsx'
+HWI_INDEX = _PACKAGE_ROOT / 'new_data' / 'HWI_index.txt'
+
+# short column names for the series stored in data.xlsx
+MONTHLY_COLUMNS = {
+    'Unemployment rate (percent)': 'unemployment_rate',
+    'Unemployment level (thousands of persons)': 'unemployment_level',
+    'Short-term unemployment level (thousands of persons)': 'short_term_unemployment_level',
+    'Labor force level (thousands of persons)': 'labor_force_level',
+    'Vacancy level (thousands)': 'vacancy_level',
+    'Vacancy rate (thousands)': 'vacancy_rate',
+}
+
+QUARTERLY_COLUMNS = {
+    'Natural rate of unemployment (percent)': 'natural_unemployment',
+    'Real output per person (index)': 'labor_productivity',
+    'Trend of unemployment rate (percent)': 'trend_unemployment',
+    'NAIRU (percent)': 'nairu',
+}
+
+# frames already mapped in this process, keyed by cache entry directory
+_LOADED = {}
+
+
+###############################################################
+def get_cache_dir(cache_dir=None):
+    '''
+    Return the directory holding the local columnar cache. The location is, in order of
+    precedence, the cache_dir argument, the BUG_CACHE_DIR environment variable, or
+    ~/.cache/bug.
+    '''
+
+    if cache_dir is None:
+        cache_dir = os.environ.get('BUG_CACHE_DIR', Path.home() / '.cache' / 'bug')
+
+    return Path(cache_dir)
+
+
+###############################################################
+@instrumented
+def load_monthly_data(path=None, cache_dir=None):
+    '''
+    This function returns the 'Monthly data' sheet of data.xlsx, 1951M1--2019M12,
+    with a monthly PeriodIndex. Column names are shortened as in MONTHLY_COLUMNS.
+
+    Parameters
+    -----------
+    path: str or Path, optional
+        Location of data.xlsx. Defaults to code/data.xlsx in the repository.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    pd.DataFrame
+        Read-only monthly series (memory-mapped from the cache).
+    '''
+
+    path = Path(path) if path is not None else DATA_XLSX
+
+    return cached_frame('monthly_data', lambda: _read_sheet(path, 'Monthly data', 'Month', MONTHLY_COLUMNS),
+                        sources=[path], cache_dir=cache_dir)
+
+
+###############################################################
+@instrumented
+def load_quarterly_data(path=None, cache_dir=None):
+    '''
+    This function returns the 'Quarterly data' sheet of data.xlsx, 1951Q1--2019Q4,
+    with a quarterly PeriodIndex. Column names are shortened as in QUARTERLY_COLUMNS.
+
+    Parameters
+    -----------
+    path: str or Path, optional
+        Location of data.xlsx. Defaults to code/data.xlsx in the repository.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    pd.DataFrame
+        Read-only quarterly series (memory-mapped from the cache).
+    '''
+
+    path = Path(path) if path is not None else DATA_XLSX
+
+    return cached_frame('quarterly_data', lambda: _read_sheet(path, 'Quarterly data', 'Quarter', QUARTERLY_COLUMNS),
+                        sources=[path], cache_dir=cache_dir)
+
+
+###############################################################
+@instrumented
+def load_recession_dates(path=None, cache_dir=None):
+    '''
+    This function returns the NBER recession dates stored in the 'Recession dates'
+    sheet of data.xlsx.
+
+    Parameters
+    -----------
+    path: str or Path, optional
+        Location of data.xlsx. Defaults to code/data.xlsx in the repository.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    pd.DataFrame
+        Indexed by the peak month of each recession, with the trough month in
+        column 'trough'.
+    '''
+
+    path = Path(path) if path is not None else DATA_XLSX
+
+    return cached_frame('recession_dates', lambda: _read_recessions(path),
+                        sources=[path], cache_dir=cache_dir)
+
+
+###############################################################
+@instrumented
+def load_hwi_index(path=None, cache_dir=None):
+    '''
+    This function returns the composite Help-Wanted Index of Barnichon (2010), in
+    percent of the labor force, from new_data/HWI_index.txt.
+
+    Parameters
+    -----------
+    path: str or Path, optional
+        Location of HWI_index.txt. Defaults to new_data/HWI_index.txt.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    pd.Series
+        Read-only monthly help-wanted index.
+    '''
+
+    path = Path(path) if path is not None else HWI_INDEX
+
+    return cached_frame('hwi_index', lambda: _read_hwi(path), sources=[path], cache_dir=cache_dir)
+
+
+###############################################################
+@instrumented
+def load_all(xlsx_path=None, hwi_path=None, cache_dir=None):
+    '''
+    Return every input series as a dict with keys 'monthly', 'quarterly',
+    'recessions' and 'hwi'. See the individual load_* functions.
+    '''
+
+    return {'monthly': load_monthly_data(xlsx_path, cache_dir=cache_dir),
+            'quarterly': load_quarterly_data(xlsx_path, cache_dir=cache_dir),
+            'recessions': load_recession_dates(xlsx_path, cache_dir=cache_dir),
+            'hwi': load_hwi_index(hwi_path, cache_dir=cache_dir)}
+
+
+###############################################################
+@instrumented
+def cached_frame(name, builder, sources=(), cache_dir=None, version=0):
+    '''
+    This function returns the pd.DataFrame (or pd.Series) produced by builder,
+    storing it the first time in a local columnar cache of memory-mapped .npy files.
+    Later calls map the cached columns back without copying them. The entry is
+    rebuilt whenever a source file changes (the modification time or size is
+    checked first, then the content hash), or when version changes.
+
+    Parameters
+    -----------
+    name: str
+        Name of the cache entry.
+    builder: callable
+        Function without arguments returning a pd.DataFrame or pd.Series with a
+        PeriodIndex. Columns must be numeric or of period dtype.
+    sources: list of str or Path, optional
+        Files the result is derived from.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+    version: int, optional
+        Version of the builder; change it to invalidate existing entries.
+
+    Returns
+    --------
+    pd.DataFrame or pd.Series
+        Read-only data backed by the cache. Copy it before modifying it.
+    '''
+
+    entry = get_cache_dir(cache_dir) / name
+    sources = [Path(s).resolve() for s in sources]
+
+    meta = _read_meta(entry)
+
+    if meta is not None and meta['cache_version'] == CACHE_VERSION and meta['version'] == version:
+        fresh = _check_sources(meta, sources)
+
+        if fresh is not None:
+            if fresh is not meta['sources']:
+                # only the file times changed, the contents are the same
+                meta['sources'] = fresh
+                _write_meta(entry, meta)
+
+            with stage('cache_map'):
+                return _map_entry(entry, meta)
+
+    with stage('cache_build'):
+        data = builder()
+        meta = _write_entry(entry, data, [_fingerprint(s) for s in sources], version)
+
+    return _map_entry(entry, meta)
+
+
+###############################################################
+def clear_cache(cache_dir=None):
+    '''
+    Delete every entry of the local cache.
+    '''
+
+    root = get_cache_dir(cache_dir)
+
+    for key in [k for k in _LOADED if Path(k).parent == root]:
+        del _LOADED[key]
+
+    if root.exists():
+        for meta in root.glob('*/meta.json'):
+            _remove_tree(meta.parent)
+
+
+
+###############################################################
+def _read_sheet(path, sheet, sub_period, columns):
+    # read one of the time-series sheets of data.xlsx
+
+    df = pd.read_excel(path, sheet_name=sheet, header=1)
+    df = df.dropna(subset=['Year', sub_period])
+
+    year = df['Year'].to_numpy(dtype='int64')
+    sub = df[sub_period].to_numpy(dtype='int64')
+
+    if sub_period == 'Month':
+        ordinals, dtype = (year - 1970) * 12 + sub - 1, 'period[M]'
+    else:
+        ordinals, dtype = (year - 1970) * 4 + sub - 1, 'period[Q-DEC]'
+
+    values = df[list(columns)].rename(columns=columns).astype(float)
+    values.index = _period_index(ordinals, dtype)
+
+    return values
+
+
+###############################################################
+def _read_recessions(path):
+    # NBER peak and trough months, e.g. 'June 1857'
+
+    df = pd.read_excel(path, sheet_name='Recession dates', header=1, usecols=['Peak month', 'Trough month'])
+    df = df.dropna()
+
+    peaks = pd.to_datetime(df['Peak month'], format='%B %Y').dt.to_period('M')
+    troughs = pd.to_datetime(df['Trough month'], format='%B %Y').dt.to_period('M')
+
+    return pd.DataFrame({'trough': troughs.values}, index=pd.PeriodIndex(peaks.values, name='peak'))
+
+
+###############################################################
+def _read_hwi(path):
+    # whitespace separated 'YYYYMmm value' rows after a 6-line preamble
+
+    df = pd.read_csv(path, skiprows=6, header=None, sep=r'\s+', names=['date', 'hwi'], dtype={'date': str})
+    df = df.dropna()
+
+    dates = df['date'].str
+    ordinals = (dates[:4].astype('int64') - 1970) * 12 + dates[-2:].astype('int64') - 1
+
+    return pd.Series(data=pd.to_numeric(df['hwi']).to_numpy(dtype=float),
+                     index=_period_index(ordinals.to_numpy(), 'period[M]'), name='hwi')
+
+
+###############################################################
+def _period_index(ordinals, dtype, name=None):
+    # dtype is a period dtype or its name, e.g. 'period[M]'
+
+    return pd.PeriodIndex(pd.arrays.PeriodArray(np.asarray(ordinals, dtype='int64'),
+                                                dtype=pd.api.types.pandas_dtype(dtype)), name=name)
+
+
+###############################################################
+def _fingerprint(path, digest=None):
+
+    st = path.stat()
+
+    if digest is None:
+        digest = _hash_file(path)
+
+    return {'path': str(path), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': digest}
+
+
+###############################################################
+def _hash_file(path):
+
+    h = hashlib.sha256()
+
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            h.update(block)
+
+    return h.hexdigest()
+
+
+###############################################################
+def _check_sources(meta, sources):
+    # returns the stored fingerprints if the sources are unchanged (refreshed
+    # if only their times changed), or None if the entry must be rebuilt
+
+    stored = meta['sources']
+
+    if [s['path'] for s in stored] != [str(p) for p in sources]:
+        return None
+
+    refreshed = []
+
+    for fp, path in zip(stored, sources):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+
+        if st.st_mtime_ns == fp['mtime_ns'] and st.st_size == fp['size']:
+            refreshed.append(fp)
+        elif st.st_size == fp['size'] and _hash_file(path) == fp['sha256']:
+            refreshed.append(_fingerprint(path, digest=fp['sha256']))
+        else:
+            return None
+
+    if all(a is b for a, b in zip(refreshed, stored)):
+        return stored
+
+    return refreshed
+
+
+###############################################################
+def _read_meta(entry):
+
+    try:
+        with open(entry / 'meta.json') as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+###############################################################
+def _write_meta(entry, meta):
+    # write then rename, so readers never see a partial file
+
+    tmp = entry / ('meta.json.' + uuid.uuid4().hex)
+
+    with open(tmp, 'w') as fh:
+        json.dump(meta, fh)
+
+    os.replace(tmp, entry / 'meta.json')
+
+
+###############################################################
+def _write_entry(entry, data, fingerprints, version):
+
+    is_series = isinstance(data, pd.Series)
+    frame = data.to_frame() if is_series else data
+
+    if not isinstance(frame.index, pd.PeriodIndex):
+        raise ValueError('cached data must have a PeriodIndex.')
+
+    period_cols = [c for c in frame.columns if isinstance(frame[c].dtype, pd.PeriodDtype)]
+    value_cols = [c for c in frame.columns if c not in period_cols]
+
+    # each generation of the entry is written to a fresh directory and made
+    # current by replacing meta.json, so concurrent readers stay consistent
+    token = uuid.uuid4().hex
+    data_dir = entry / token
+    data_dir.mkdir(parents=True)
+
+    np.save(data_dir / 'index.npy', frame.index.asi8)
+    # Fortran order: each column is contiguous, and pandas keeps the
+    # 2d block as a view when the frame is rebuilt from it
+    np.save(data_dir / 'values.npy', np.asfortranarray(frame[value_cols].to_numpy(dtype=float)))
+
+    if period_cols:
+        np.save(data_dir / 'periods.npy',
+                np.asfortranarray(np.column_stack([frame[c].array.asi8 for c in period_cols])))
+
+    old = _read_meta(entry)
+
+    meta = {'cache_version': CACHE_VERSION,
+            'version': version,
+            'token': token,
+            'sources': fingerprints,
+            'series': frame.columns[0] if is_series else None,
+            'index_name': frame.index.name,
+            'dtype': str(frame.index.dtype),
+            'value_columns': value_cols,
+            'period_columns': [[c, str(frame[c].dtype)] for c in period_cols]}
+
+    _write_meta(entry, meta)
+
+    # the previous generation is kept, as a reader may have just read its meta.json;
+    # the ones before it are no longer referenced by any meta a reader can hold
+    keep = {token} if old is None else {token, old.get('token')}
+    _sweep_entry(entry, keep)
+
+    return meta
+
+
+###############################################################
+def _sweep_entry(entry, keep):
+    # remove the generations of the entry other than keep
+
+    for data_dir in entry.iterdir():
+        if data_dir.is_dir() and data_dir.name not in keep:
+            _remove_tree(data_dir)
+
+
+###############################################################
+def _map_entry(entry, meta):
+    # a new frame on each call, over the arrays mapped once per process: callers may
+    # add or replace columns of their frame without changing the others' frames
+
+    key = str(entry)
+
+    if key not in _LOADED or _LOADED[key][0] != meta['token']:
+        data_dir = entry / meta['token']
+
+        try:
+            index = _period_index(np.load(data_dir / 'index.npy', mmap_mode='r'), meta['dtype'], meta['index_name'])
+            values = np.load(data_dir / 'values.npy', mmap_mode='r')
+            periods = np.load(data_dir / 'periods.npy', mmap_mode='r') if meta['period_columns'] else None
+        except FileNotFoundError:
+            # the generation was swept by concurrent writes since meta was read:
+            # map the current one instead
+            current = _read_meta(entry)
+            if current is None or current['token'] == meta['token']:
+                raise
+            return _map_entry(entry, current)
+
+        _LOADED[key] = (meta['token'], (index, values, periods))
+
+    index, values, periods = _LOADED[key][1]
+
+    frame = pd.DataFrame(values, index=index, columns=meta['value_columns'], copy=False)
+
+    for j, (c, dtype) in enumerate(meta['period_columns']):
+        frame[c] = _period_index(periods[:, j], dtype)
+
+    return frame[meta['series']] if meta['series'] is not None else frame
+
+
+###############################################################
+def _remove_tree(path):
+    # best-effort removal, mapped files stay readable until released
+
+    if not path.exists():
+        return
+
+    for p in sorted(path.rglob('*'), reverse=True):
+        try:
+            p.rmdir() if p.is_dir() else p.unlink()
+        except OSError:
+            pass
+
+    try:
+        path.rmdir()
+    except OSError:
+        pass
@@ -2,15 +2,19 @@ import numpy as np
 import pandas as pd
 from scipy.optimize import root
 
+from .instrument import instrumented, count
+
 ## functions:
 
 ### unemployment: compute_beveridgean_unemployment
 ### elasticity: compute_matching_elasticity
 ### efficacy: compute_separation_efficacy, compute_matching_efficacy
 ### efficiency: compute_efficiency_endogenous, compute_efficiency_hosios
+### scenarios: simulate_dmp_scenarios, DMPScenarios
 
 
 ###############################################################
+@instrumented
 def compute_beveridgean_unemployment(f, lamb):
     '''
     This function computes the Beveridgean unemployment rate in a 
@@ -34,6 +38,7 @@ def compute_beveridgean_unemployment(f, lamb):
     return lamb / (lamb + f)
 
 ###############################################################
+@instrumented
 def compute_matching_elasticity(u, epsilon):
     '''
     This function computes the matching elasticity eta in a DMP model from
@@ -57,6 +62,7 @@ def compute_matching_elasticity(u, epsilon):
     
 
 ###############################################################
+@instrumented
 def compute_separation_efficacy(u, eta, theta):
     '''
     This function computes the separation-efficacy ratio lambda/omega in a DMP model 
@@ -81,6 +87,7 @@ def compute_separation_efficacy(u, eta, theta):
     return np.power(theta, (1. - eta)) * u/(1. - u)    
     
 ###############################################################
+@instrumented
 def compute_matching_efficacy(f, theta, eta):    
     '''
     This function computes the matching efficacy in a DMP model from the 
@@ -115,6 +122,7 @@ def _theta_expr(theta_star, *inputs):
     return expr     
 
 ###############################################################
+@instrumented
 def compute_endogenous_efficiency(eta, lo, zeta=.26, kappa=.92 ):
     '''
     This function computes the efficient unemployment rate u_star and efficient labor-market 
@@ -143,6 +151,7 @@ def compute_endogenous_efficiency(eta, lo, zeta=.26, kappa=.92 ):
     '''
 
     theta_star = np.array([root( _theta_expr, 0.0, (eta.loc[t], lo.loc[t], zeta, kappa) ).x[0] for t in eta.index])
+    count('root_solves', len(theta_star))
     
     # Apply equation (A11)
     u_star = lo / (lo + theta_star**(1.0-eta) )
@@ -161,6 +170,7 @@ def _hosios_expr(theta_star, *inputs):
 
     
 ###############################################################
+@instrumented
 def compute_hosios_efficiency(eta, lamb, omega,  u0, r=0.012, zeta=.26, kappa=.92,):
     '''
     This function computes the efficient unemployment rate u_star and efficient labor-market 
@@ -194,6 +204,7 @@ def compute_hosios_efficiency(eta, lamb, omega,  u0, r=0.012, zeta=.26, kappa=.9
     '''
 
     theta_star = np.array([root( _hosios_expr, 0.0, (eta.loc[t], lamb.loc[t], omega.loc[t], r, zeta, kappa) ).x[0] for t in eta.index])
+    count('root_solves', len(theta_star))
     
     f_star = omega * theta_star**(1.0 - eta)
     
@@ -208,3 +219,169 @@ def compute_hosios_efficiency(eta, lamb, omega,  u0, r=0.012, zeta=.26, kappa=.9
     return u_star, theta_star
     
 
+
+
+
+###############################################################
+def _hosios_theta(eta, lamb, omega, r, zeta, kappa, tol=1e-12, maxiter=100):
+    # vectorized Newton solve of _hosios_expr = 0, in log theta: the expression is
+    # then convex and increasing, so the iterates converge from any starting point
+    
+    b = (1.0-eta)*(1.0-zeta)/kappa
+    c = (lamb+r)/omega
+    
+    s = np.log(b / (eta + c))
+    
+    for _ in range(maxiter):
+        a1, a2 = eta*np.exp(s), c*np.exp(eta*s)
+        step = (a1 + a2 - b) / (a1 + eta*a2)
+        s = s - step
+        if not np.any(np.abs(step) > tol):
+            break
+    
+    count('root_solves', s.size)
+    
+    return np.exp(s)
+    
+
+###############################################################
+@instrumented
+def simulate_dmp_scenarios(lamb, omega, eta, theta, u0, u_star0=None, r=0.012, zeta=.26, kappa=.92, index=None):
+    '''
+    This function simulates the unemployment rate u, the efficient unemployment rate 
+    u_star and the unemployment gap in a DMP model along scenario paths of the 
+    job-separation rate lambda, matching efficacy omega, matching elasticity eta and 
+    labor-market tightness theta. All scenarios are simulated at once: unemployment 
+    follows the law of motion of compute_hosios_efficiency, with the job-finding rate 
+    f = omega * theta^(1-eta), and u_star follows it at the efficient tightness 
+    theta_star given by the Hosios condition (solved by a vectorized Newton method).
+    
+    The model does not determine tightness itself, as wages are not modelled: theta is 
+    an input, e.g. scenarios of the observed v/u. With theta=None, tightness is the 
+    efficient one, theta_star, as in an equilibrium where wage bargaining satisfies the 
+    Hosios condition; the gap then only reflects the initial rates.
+    
+    Parameters
+    -----------
+    lamb: scalar or np.array
+        Job-separation rate, per period, with shape (scenarios, horizon), or (horizon,) 
+        for a path common to all scenarios.
+    omega: scalar or np.array
+        Matching efficacy, shaped as lamb.
+    eta: scalar or np.array
+        Matching elasticity, shaped as lamb.
+    theta: scalar, np.array or None
+        Labor-market tightness, shaped as lamb, or None for theta_star.
+    u0: scalar or np.array
+        Initial unemployment rate, or one per scenario.
+    u_star0: scalar or np.array, optional
+        Initial efficient unemployment rate. Default is the Beveridgean efficient rate 
+        of the first period.
+    r: scalar, optional
+        Discount rate.
+    zeta: scalar, optional
+        Relative productivity of unemployed workers.
+    kappa: scalar, optional
+        Recruiting cost.
+    index: array-like, optional
+        Labels of the periods (e.g. quarters), used by DMPScenarios.quantiles.
+    
+    Returns
+    --------
+    DMPScenarios
+        Simulated paths, with shape (scenarios, horizon).
+    '''
+    
+    # the initial rates (one per scenario) are broadcast as columns, with the paths
+    paths = [np.atleast_2d(np.asarray(np.nan if a is None else a, dtype=float)) for a in (lamb, omega, eta, theta)]
+    starts = [np.asarray(a, dtype=float).reshape(-1, 1) for a in (u0, u_star0) if a is not None]
+    
+    lamb, omega, eta, theta_in, *starts = np.broadcast_arrays(*paths, *starts)
+    n_scen, horizon = lamb.shape
+    
+    theta_star = _hosios_theta(eta, lamb, omega, r, zeta, kappa)
+    theta = theta_star if theta is None else theta_in
+    
+    f = omega * theta**(1.0 - eta)
+    f_star = omega * theta_star**(1.0 - eta)
+    
+    ub = compute_beveridgean_unemployment(f, lamb)
+    ub_star = compute_beveridgean_unemployment(f_star, lamb)
+    
+    # u_{t+1} = ub_t + (u_t - ub_t) exp(-(lambda_t + f_t)), for all scenarios at once
+    decay = np.exp(-(lamb + f))
+    decay_star = np.exp(-(lamb + f_star))
+    
+    u = np.empty((n_scen, horizon))
+    u_star = np.empty((n_scen, horizon))
+    u[:, 0] = starts[0][:, 0]
+    u_star[:, 0] = ub_star[:, 0] if u_star0 is None else starts[1][:, 0]
+    
+    for t in range(horizon - 1):
+        u[:, t+1] = ub[:, t] + (u[:, t] - ub[:, t]) * decay[:, t]
+        u_star[:, t+1] = ub_star[:, t] + (u_star[:, t] - ub_star[:, t]) * decay_star[:, t]
+    
+    return DMPScenarios(u, u_star, theta, theta_star, f, index)
+
+
+###############################################
+class DMPScenarios():
+    """
+    Class to hold the paths simulated by simulate_dmp_scenarios
+
+    Attributes
+    ----------
+    u: np.array
+        Unemployment rate, shape (scenarios, horizon).
+    u_star: np.array
+        Efficient unemployment rate.
+    gap: np.array
+        Unemployment gap u - u_star.
+    theta: np.array
+        Labor-market tightness.
+    theta_star: np.array
+        Efficient labor-market tightness (Hosios condition).
+    f: np.array
+        Job-finding rate.
+    index: pd.Index
+        Labels of the periods.
+    """
+    
+    def __init__(self, u, u_star, theta, theta_star, f, index=None):
+    
+        self.u = u
+        self.u_star = u_star
+        self.gap = u - u_star
+        self.theta = theta
+        self.theta_star = theta_star
+        self.f = f
+        self.index = pd.RangeIndex(u.shape[1]) if index is None else pd.Index(index)
+        
+    @property
+    def n_scenarios(self):
+        return self.u.shape[0]
+        
+    @property
+    def horizon(self):
+        return self.u.shape[1]
+        
+    def quantiles(self, name='gap', q=(.05, .1, .25, .5, .75, .9, .95)):
+        '''
+        Return the quantiles across scenarios of the path name ('u', 'u_star', 'gap', 
+        'theta', 'theta_star' or 'f') at each period, as a DataFrame with one column 
+        per quantile, for fan charts.
+        '''
+        
+        values = np.quantile(getattr(self, name), q, axis=0)
+        
+        return pd.DataFrame(values.T, index=self.index, columns=list(q))
+        
+    def mean(self, name='gap'):
+        '''
+        Return the mean across scenarios of the path name at each period.
+        '''
+        
+        return pd.Series(getattr(self, name).mean(axis=0), index=self.index, name=name)
+        
+    def __repr__(self):
+        return 'DMPScenarios(n_scenarios={}, horizon={})'.format(self.n_scenarios, self.horizon)
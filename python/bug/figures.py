@@ -0,0 +1,580 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented
+
+## functions:
+
+### data: compute_figure_data
+### build: build_figures, FIGURES, TABLES
+
+# matplotlib is imported in the rendering processes only, and only through its
+# object-oriented API (Figure, FigureCanvasAgg): no pyplot state is involved
+
+
+# calibration of the sufficient statistics, as in the figure*.m scripts
+ZETA, ZETA_LOW, ZETA_HIGH, ZETA_HM = 0.26, 0.03, 0.49, 0.96
+KAPPA = 0.92
+KAPPA_LOW, KAPPA_HIGH = 2/3 * KAPPA, 4/3 * KAPPA
+R = 0.012
+
+# change to rebuild the cached figure data, or all the figures; the figure data are
+# also rebuilt when the modules computing them change (see _FIGURE_DATA_MODULES)
+FIGURE_DATA_VERSION = 2
+FIGURES_VERSION = 1
+
+# modules computing the figure data, checked as sources of the cache entry
+_FIGURE_DATA_MODULES = ('data', 'splice', 'pipeline', 'breakpoints', 'suffstats', 'jobrates', 'dmpmodel', 'figures')
+
+# 95% confidence intervals of the break dates, from the Bai-Perron algorithm (getBreakDate.m);
+# drawn only when the estimated breaks are the same
+_BREAK_CI = {41: (40, 48), 84: (80, 89), 153: (152, 160), 194: (193, 200), 235: (232, 237)}
+
+_COLORS = {'purple': '#7570b3', 'pink': '#e7298a', 'black': '#666666', 'green': '#1b9e77', 'orange': '#d95f02',
+           'gray': '#c0c0c0'}
+
+# line styles of formatPlot.m: name -> (color, linewidth, linestyle)
+_LINES = {'purple': ('purple', 3, '-'), 'pink': ('pink', 3, '-'), 'orange': ('orange', 3, '-'),
+          'thin_purple': ('purple', 0.5, '-'), 'thin_pink': ('pink', 0.5, '-'), 'thin_orange': ('orange', 1, '-'),
+          'green_dashed': ('green', 3, '--'), 'black_dotted': ('black', 3, ':'), 'orange_dashdot': ('orange', 3, '-.')}
+
+# formatFigure.m, with a smaller font so that the longest labels fit
+_RC = {'figure.figsize': (7.7779, 5.8334), 'font.size': 18, 'axes.linewidth': 1, 'axes.grid': True,
+       'axes.grid.axis': 'y', 'grid.color': 'k', 'grid.alpha': 0.15, 'xtick.direction': 'out',
+       'ytick.direction': 'out', 'axes.spines.top': False, 'axes.spines.right': False}
+
+
+###############################################################
+@instrumented
+def compute_figure_data(xlsx_path=None, cache_dir=None):
+    '''
+    This function computes all the quarterly series displayed in the figures of
+    Michaillat & Saez (2021), 1951Q1--2019Q4, from data.xlsx. The result is stored in
+    the local data cache, and only recomputed when data.xlsx or the code computing it
+    changes. The elasticity bands LB and UB use Newey-West HAC standard errors, and differ
+    from those of the MATLAB code (Bai-Perron corrected standard errors) by up to 0.12.
+
+    Parameters
+    -----------
+    xlsx_path: str or Path, optional
+        Location of data.xlsx. Default is code/data.xlsx of the repository.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    pd.DataFrame
+        Quarterly series (read-only): u, v, theta, the Beveridge elasticity (E, LB, UB) and
+        its branch, the efficient unemployment rate and tightness under the calibrations
+        of the paper, the inverse-optimum statistics, the series of the DMP model, and
+        labor productivity.
+    '''
+
+    from .data import DATA_XLSX, cached_frame
+
+    xlsx_path = DATA_XLSX if xlsx_path is None else xlsx_path
+
+    modules = [Path(__file__).with_name(m + '.py') for m in _FIGURE_DATA_MODULES]
+
+    return cached_frame('figure_data', lambda: _figure_data(xlsx_path, cache_dir), sources=[xlsx_path] + modules,
+                        cache_dir=cache_dir, version=FIGURE_DATA_VERSION)
+
+
+###############################################################
+@instrumented
+def build_figures(output_dir, names=None, jobs=None, force=False, xlsx_path=None, cache_dir=None):
+    '''
+    This function renders the figures of the paper to <output_dir>/pdf/<name>.pdf and
+    writes their data tables to <output_dir>/xlsx/<table>.xlsx, in the layout of the
+    figure*.m scripts. Figures are rendered in a process pool with the Agg canvas, from
+    the cached results of compute_figure_data. A figure or table is only rebuilt when
+    the data it displays (or FIGURES_VERSION) changed since the last build in output_dir.
+
+    Parameters
+    -----------
+    output_dir: str or Path
+        Output directory, e.g. 'build/figures'. The figures directory of the repository
+        holds the MATLAB output, which the tests compare against.
+    names: list of str, optional
+        Figures to build, e.g. ['figure6', 'figure7B']. Default all, see FIGURES.
+    jobs: int, optional
+        Number of processes. Default os.cpu_count(); 1 renders in this process.
+    force: bool, optional
+        Whether to rebuild the figures even if their inputs did not change. Default False.
+    xlsx_path: str or Path, optional
+        Location of data.xlsx. Default is code/data.xlsx of the repository.
+    cache_dir: str or Path, optional
+        Location of the local cache. See get_cache_dir.
+
+    Returns
+    --------
+    dict
+        Output name -> 'built' or 'unchanged'.
+    '''
+
+    from .data import load_recession_dates
+
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [n for n in names if n not in FIGURES]
+    if unknown:
+        raise ValueError('unknown figures: {}'.format(', '.join(unknown)))
+
+    output_dir = Path(output_dir)
+    (output_dir / 'pdf').mkdir(parents=True, exist_ok=True)
+    (output_dir / 'xlsx').mkdir(parents=True, exist_ok=True)
+
+    data = compute_figure_data(xlsx_path, cache_dir=cache_dir)
+    recessions = _recession_spans(load_recession_dates(xlsx_path, cache_dir=cache_dir), data.index)
+
+    manifest_path = output_dir / '.figures.json'
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    tasks, status = [], {}
+
+    outputs = [('figure', n, output_dir / 'pdf' / (n + '.pdf')) for n in names]
+    tables = dict.fromkeys(FIGURES[n][1] for n in names if FIGURES[n][1] is not None)
+    outputs += [('table', t, output_dir / 'xlsx' / (t + '.xlsx')) for t in tables]
+
+    for kind, name, path in outputs:
+        columns = FIGURES[name][2] if kind == 'figure' else TABLES[name][1]
+        subset = data[list(columns)]
+        digest = _digest(kind, name, subset, recessions)
+        key = '{}:{}'.format(kind, name)
+
+        if not force and manifest.get(key) == digest and path.exists():
+            status[path.name] = 'unchanged'
+            continue
+
+        tasks.append((kind, name, str(path), subset.copy(), recessions))
+        manifest[key] = digest
+
+    jobs = os.cpu_count() if jobs is None else jobs
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            done = list(pool.map(_render, tasks))
+    else:
+        done = [_render(task) for task in tasks]
+
+    for path in done:
+        status[Path(path).name] = 'built'
+
+    tmp = manifest_path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, manifest_path)
+
+    return status
+
+
+###############################################################
+def _figure_data(xlsx_path, cache_dir):
+    # builder of compute_figure_data
+
+    from .dmpmodel import compute_beveridgean_unemployment, compute_matching_elasticity, compute_matching_efficacy
+    from .data import load_quarterly_data
+    from .pipeline import load_cached_inputs, run_gap_pipeline
+    from .suffstats import (compute_efficient_unemployment, compute_efficient_tightness, compute_beveridge_inverse,
+                            compute_recruiting_inverse, compute_nonwork_inverse)
+    from statsmodels.tsa.filters.hp_filter import hpfilter
+
+    result = run_gap_pipeline(load_cached_inputs(xlsx_path, cache_dir=cache_dir), zeta=ZETA, kappa=KAPPA,
+                              efficiency=True, r=R)
+
+    df = result.frame.drop(columns=['SE', 'theta_star_endogenous', 'theta_star_hosios'])
+    u, v, e = df['u'], df['v'], df['E']
+
+    df['branch'] = np.searchsorted(result.bkps[1:], np.arange(len(df)), side='right').astype(float)
+    df['log_u'], df['log_v'] = np.log(u), np.log(v)
+    df['theta'] = v / u
+    df['theta_star'] = compute_efficient_tightness(e, zeta=ZETA, kappa=KAPPA)
+
+    variants = {'lb': (df['LB'], ZETA, KAPPA), 'ub': (df['UB'], ZETA, KAPPA),
+                'zeta_low': (e, ZETA_LOW, KAPPA), 'zeta_high': (e, ZETA_HIGH, KAPPA),
+                'kappa_low': (e, ZETA, KAPPA_LOW), 'kappa_high': (e, ZETA, KAPPA_HIGH), 'hm': (e, ZETA_HM, KAPPA)}
+    for name, (epsilon, zeta, kappa) in variants.items():
+        df['u_star_' + name] = compute_efficient_unemployment(u, v, epsilon=epsilon, zeta=zeta, kappa=kappa)
+
+    df['epsilon_star'] = compute_beveridge_inverse(df['theta'], zeta=ZETA, kappa=KAPPA)
+    df['zeta_star'] = compute_nonwork_inverse(df['theta'], e, kappa=KAPPA)
+    df['kappa_star'] = compute_recruiting_inverse(df['theta'], e, zeta=ZETA)
+
+    for name, value in {'zeta': ZETA, 'zeta_low': ZETA_LOW, 'zeta_high': ZETA_HIGH,
+                        'kappa': KAPPA, 'kappa_low': KAPPA_LOW, 'kappa_high': KAPPA_HIGH}.items():
+        df[name] = value
+
+    df['u_beveridgean'] = compute_beveridgean_unemployment(df['f'], df['lambda'])
+    df['eta'] = compute_matching_elasticity(u, e)
+    df['omega'] = compute_matching_efficacy(df['f'], df['theta'], df['eta'])
+
+    quarterly = load_quarterly_data(xlsx_path, cache_dir=cache_dir).reindex(df.index)
+    df['natural'] = quarterly['natural_unemployment'] / 100.
+    df['trend'] = quarterly['trend_unemployment'] / 100.
+    df['nairu'] = quarterly['nairu'] / 100.
+
+    # HP filter of log productivity, as in figureA8.m
+    p = quarterly['labor_productivity'].astype(float)
+    cycle, trend = hpfilter(np.log(p), 1600)
+    df['p'], df['p_trend'], df['p_cycle'] = p, np.exp(trend), np.exp(cycle)
+    df['u_star_fluctuating'] = compute_efficient_unemployment(u, v, epsilon=e, zeta=ZETA / df['p_cycle'], kappa=KAPPA)
+
+    return df.astype(float)
+
+
+###############################################################
+def _recession_spans(recessions, index):
+    # (start, end) of the recessions within the sample, in years at the start of
+    # the quarter of the peak and trough months, as in getRecessionDate.m
+
+    peaks = recessions.index.asfreq('Q')
+    troughs = pd.PeriodIndex(recessions['trough']).asfreq('Q')
+    keep = (peaks >= index[0]) & (peaks <= index[-1])
+
+    return [(_years(p), _years(t)) for p, t in zip(peaks[keep], troughs[keep])]
+
+
+###############################################################
+def _years(period):
+
+    return period.year + (period.quarter - 1) / 4.
+
+
+###############################################################
+def _digest(kind, name, subset, recessions):
+
+    h = hashlib.sha256('{}:{}:{}:{}'.format(FIGURES_VERSION, kind, name, list(subset.columns)).encode())
+    h.update(np.ascontiguousarray(subset.to_numpy(dtype=float)).tobytes())
+    h.update(np.asarray(subset.index.asi8).tobytes())
+    h.update(np.asarray(recessions, dtype=float).tobytes())
+
+    return h.hexdigest()
+
+
+###############################################################
+def _render(task):
+    # renders a figure or writes a table; runs in a pool process
+
+    kind, name, path, data, recessions = task
+
+    if kind == 'table':
+        _write_table(name, path, data)
+        return path
+
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    draw, _, _ = FIGURES[name]
+
+    with matplotlib.rc_context(_RC):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
+        draw(ax, data, recessions, name)
+        fig.tight_layout()
+        # no creation date, so that unchanged figures give identical files
+        fig.savefig(path, format='pdf', metadata={'CreationDate': None})
+
+    return path
+
+
+###############################################################
+def _write_table(name, path, data):
+    # data table in the layout of the figure*.m scripts: source, header, then values
+
+    from openpyxl import Workbook
+
+    sheet, columns, headers = TABLES[name]
+
+    wb = Workbook()
+    ws = wb.active
+
+    if name == 'figure5':
+        _write_breaks_tables(wb, data)
+    else:
+        ws.title = sheet
+        ws.append([None, 'Source:', 'bug/figures.py'])
+        ws.append(['Year', 'Quarter'] + list(headers))
+        for p, row in zip(data.index, data.itertuples(index=False)):
+            ws.append([p.year, p.quarter] + [None if np.isnan(x) else float(x) for x in row])
+
+    tmp = path + '.tmp'
+    wb.save(tmp)
+    os.replace(tmp, path)
+
+
+###############################################################
+def _write_breaks_tables(wb, data):
+    # figure5.xlsx: the break dates, then the branches of the Beveridge curve
+
+    bkps = _branch_bkps(data['branch'])
+    years = [_years(p) for p in data.index]
+
+    ws = wb.active
+    ws.title = 'Structural breaks'
+    ws.append(['Source:', 'bug/figures.py'])
+    ws.append(['Break date', 'Low end of 95% confidence interval for break date',
+               'High end of 95% confidence interval for break date'])
+
+    ci = _break_ci(bkps)
+    for idx, b in enumerate(bkps[1:-1]):
+        low, high = (None, None) if ci is None else (years[ci[idx][0] - 1], years[ci[idx][1] - 1])
+        ws.append([years[b - 1], low, high])
+
+    log_u, log_v = np.log(data['u'].to_numpy()), np.log(data['v'].to_numpy())
+
+    for idx, b in enumerate(bkps[:-1]):
+        ws = wb.create_sheet('Figure 5' + 'ABCDEFGHIJ'[idx])
+        ws.append(['Source:', 'bug/figures.py'])
+        ws.append(['Log unemployment rate', 'Log vacancy rate'])
+        for x, y in zip(log_u[b:bkps[idx+1]], log_v[b:bkps[idx+1]]):
+            ws.append([float(x), float(y)])
+
+
+###############################################################
+def _branch_bkps(branch):
+    # breakpoints [0, ..., len] from the branch number of each quarter
+
+    branch = np.asarray(branch)
+
+    return [0] + [int(i) for i in np.flatnonzero(np.diff(branch)) + 1] + [len(branch)]
+
+
+###############################################################
+def _break_ci(bkps):
+
+    if all(b in _BREAK_CI for b in bkps[1:-1]):
+        return [_BREAK_CI[b] for b in bkps[1:-1]]
+
+    return None
+
+
+###############################################################
+def _format_axes(ax, ylim, yticks, ylabel, ticklabels=None):
+    # formatPlot.m settings for the time series
+
+    ax.set_xlim(1951, 2019.75)
+    ax.set_xticks([1951, 1970, 1985, 2000, 2019])
+    ax.set_ylim(*ylim)
+    ax.set_yticks(yticks)
+    if ticklabels is not None:
+        ax.set_yticklabels(ticklabels)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(length=4)
+
+
+###############################################################
+def _percent(ticks, scale=100.):
+
+    return ['{:g}%'.format(round(scale*t, 6)) for t in ticks]
+
+
+###############################################################
+def _draw_series(ax, data, recessions, lines, ylim, step, ylabel, band=None, gap=None, percent=False,
+                 ticklabels=None):
+    # recession areas, an optional band (low, high, color) or gap shading
+    # (actual, efficient), then the lines (column or constant, style)
+
+    x = np.array([_years(p) for p in data.index])
+
+    for start, end in recessions:
+        ax.axvspan(start, end, facecolor='black', alpha=0.15, linewidth=0, zorder=-10)
+
+    if band is not None:
+        low, high, color = band
+        low = data[low] if isinstance(low, str) else np.full(len(x), low)
+        high = data[high] if isinstance(high, str) else np.full(len(x), high)
+        ax.fill_between(x, low, high, facecolor=_COLORS[color], alpha=0.2, linewidth=0)
+
+    if gap is not None:
+        actual, efficient, above, below = gap
+        ax.fill_between(x, data[efficient], data[actual], where=data[actual] >= data[efficient],
+                        facecolor=_COLORS[above], alpha=0.2, linewidth=0, interpolate=True)
+        ax.fill_between(x, data[efficient], data[actual], where=data[actual] < data[efficient],
+                        facecolor=_COLORS[below], alpha=0.2, linewidth=0, interpolate=True)
+
+    for col, style in lines:
+        color, width, linestyle = _LINES[style]
+        y = data[col] if isinstance(col, str) else np.full(len(x), col)
+        ax.plot(x, y, color=_COLORS[color], linewidth=width, linestyle=linestyle)
+
+    yticks = np.round(np.arange(ylim[0], ylim[1] + step/2, step), 10)
+
+    if percent:
+        ticklabels = _percent(yticks)
+
+    _format_axes(ax, ylim, yticks, ylabel, ticklabels)
+
+
+###############################################################
+def _draw_beveridge_curve(ax, data, recessions, name):
+    # figures 1C-1F (branches 1951-1969, ..., 2010-2019) and 5A-5F (branches between
+    # the structural breaks, with the confidence intervals of the break dates)
+
+    log_u, log_v = np.log(data['u'].to_numpy()), np.log(data['v'].to_numpy())
+
+    if name.startswith('figure1'):
+        bkps = [0, 76, 156, 236, len(log_u)]
+        idx = 'CDEF'.index(name[-1])
+        cis = []
+    else:
+        bkps = _branch_bkps(data['branch'])
+        idx = 'ABCDEFGHIJ'.index(name[-1])
+        ci = _break_ci(bkps)
+        # interval of the break at the start and at the end of the branch
+        cis = [] if ci is None else [ci[i] for i in (idx - 1, idx) if 0 <= i < len(ci)]
+
+    ax.plot(log_u, log_v, color=_COLORS['gray'], linewidth=1)
+
+    for low, high in cis:
+        ax.plot(log_u[low-1:high], log_v[low-1:high], color=_COLORS['purple'], alpha=0.2, linewidth=12)
+
+    if idx + 1 < len(bkps):
+        ax.plot(log_u[bkps[idx]:bkps[idx+1]], log_v[bkps[idx]:bkps[idx+1]], color=_COLORS['purple'], linewidth=3)
+
+    ax.set_xlim(-3.7, -2.2)
+    ax.set_xticks(np.round(np.arange(-3.7, -2.15, 0.3), 10))
+    ax.set_ylim(-4.2, -3)
+    ax.set_yticks(np.round(np.arange(-4.2, -2.95, 0.3), 10))
+    ax.grid(axis='both')
+    ax.tick_params(length=0)
+    ax.set_xlabel('Log unemployment rate')
+    ax.set_ylabel('Log vacancy rate')
+
+
+###############################################################
+def _series(**spec):
+    # draw function of a time-series figure
+
+    def draw(ax, data, recessions, name):
+        _draw_series(ax, data, recessions, **spec)
+
+    return draw
+
+
+_U = dict(ylim=(0, 0.12), step=0.03, ylabel='Unemployment rate', percent=True)
+_U_STAR = dict(ylim=(0, 0.06), step=0.01, ylabel='Efficient unemployment rate', percent=True)
+
+# figure name -> (draw function, table name, columns displayed)
+FIGURES = {
+    'figure1A': (_series(lines=[('u', 'purple')], **_U), 'figure1A', ['u']),
+    'figure1B': (_series(lines=[('v', 'purple')], ylim=(0, 0.05), step=0.01, ylabel='Vacancy rate', percent=True),
+                 'figure1B', ['v']),
+    'figure5A': (_draw_beveridge_curve, 'figure5', ['u', 'v', 'branch']),
+    'figure6': (_series(band=('LB', 'UB', 'purple'), lines=[('LB', 'thin_purple'), ('UB', 'thin_purple'), ('E', 'purple')],
+                        ylim=(0, 1.5), step=0.3, ylabel='Beveridge elasticity'), 'figure6', ['E', 'LB', 'UB']),
+    'figure7A': (_series(gap=('theta', 'theta_star', 'pink', 'purple'), lines=[('theta', 'purple'), ('theta_star', 'pink')],
+                         ylim=(0, 1.5), step=0.3, ylabel='Labor-market tightness'), 'figure7A', ['theta', 'theta_star']),
+    'figure7B': (_series(gap=('u', 'u_star', 'purple', 'pink'), lines=[('u', 'purple'), ('u_star', 'pink')], **_U),
+                 'figure7B', ['u', 'u_star']),
+    'figure7C': (_series(lines=[('gap', 'purple')], ylim=(-0.02, 0.08), step=0.02,
+                         ylabel='Unemployment gap (percentage points)', ticklabels=['-2', '0', '2', '4', '6', '8']),
+                 'figure7C', ['gap']),
+    'figure7D': (_series(lines=[('natural', 'green_dashed'), ('trend', 'black_dotted'), ('nairu', 'orange_dashdot'),
+                                ('u_star', 'pink')], ylim=(0, 0.1), step=0.02, ylabel='Unemployment rate', percent=True),
+                 'figure7D', ['u_star', 'natural', 'trend', 'nairu']),
+    'figure8A': (_series(band=('u_star_lb', 'u_star_ub', 'pink'),
+                         lines=[('u', 'purple'), ('u_star', 'pink'), ('u_star_lb', 'thin_pink'), ('u_star_ub', 'thin_pink')],
+                         **_U), 'figure8A', ['u', 'u_star', 'u_star_lb', 'u_star_ub']),
+    'figure8B': (_series(band=('u_star_zeta_low', 'u_star_zeta_high', 'pink'),
+                         lines=[('u', 'purple'), ('u_star', 'pink'), ('u_star_zeta_low', 'thin_pink'),
+                                ('u_star_zeta_high', 'thin_pink')], **_U),
+                 'figure8B', ['u', 'u_star', 'u_star_zeta_low', 'u_star_zeta_high']),
+    'figure8C': (_series(band=('u_star_kappa_low', 'u_star_kappa_high', 'pink'),
+                         lines=[('u', 'purple'), ('u_star', 'pink'), ('u_star_kappa_low', 'thin_pink'),
+                                ('u_star_kappa_high', 'thin_pink')], **_U),
+                 'figure8C', ['u', 'u_star', 'u_star_kappa_low', 'u_star_kappa_high']),
+    'figure9A': (_series(band=('LB', 'UB', 'purple'), lines=[('LB', 'thin_purple'), ('UB', 'thin_purple'), ('E', 'purple'),
+                                                             ('epsilon_star', 'pink')],
+                         ylim=(0, 6), step=2, ylabel='Beveridge elasticity'), 'figure9A', ['epsilon_star', 'E', 'LB', 'UB']),
+    'figure9B': (_series(band=(ZETA_LOW, ZETA_HIGH, 'purple'), lines=[(ZETA_LOW, 'thin_purple'), (ZETA_HIGH, 'thin_purple'),
+                                                                      (ZETA, 'purple'), ('zeta_star', 'pink')],
+                         ylim=(-0.5, 1), step=0.5, ylabel='Social value of nonwork'), 'figure9B', ['zeta_star']),
+    'figure9C': (_series(band=(KAPPA_LOW, KAPPA_HIGH, 'purple'), lines=[(KAPPA_LOW, 'thin_purple'), (KAPPA_HIGH, 'thin_purple'),
+                                                                        (KAPPA, 'purple'), ('kappa_star', 'pink')],
+                         ylim=(0, 6), step=2, ylabel='Recruiting cost'), 'figure9C', ['kappa_star']),
+    'figure10': (_series(gap=('u', 'u_star_hm', 'purple', 'pink'), lines=[('u', 'purple'), ('u_star_hm', 'pink')],
+                         ylim=(0, 0.3), step=0.1, ylabel='Unemployment rate', percent=True), 'figure10', ['u', 'u_star_hm']),
+    'figureA1': (_series(lines=[('f', 'purple')], ylim=(0, 4), step=1, ylabel='Quarterly job-finding rate'),
+                 'figureA1', ['f']),
+    'figureA2': (_series(lines=[('lambda', 'purple')], ylim=(0, 0.2), step=0.05, ylabel='Quarterly job-separation rate'),
+                 'figureA2', ['lambda']),
+    'figureA3': (_series(lines=[('u', 'purple'), ('u_beveridgean', 'orange')], **_U), 'figureA3', ['u', 'u_beveridgean']),
+    'figureA4': (_series(lines=[('eta', 'purple')], ylim=(0, 0.6), step=0.2, ylabel='Matching elasticity'),
+                 'figureA4', ['eta']),
+    'figureA5': (_series(lines=[('u_star', 'pink'), ('u_star_endogenous', 'orange')], **_U_STAR),
+                 'figureA5', ['u_star', 'u_star_endogenous']),
+    'figureA6': (_series(lines=[('omega', 'purple')], ylim=(0, 4), step=1, ylabel='Quarterly matching efficacy'),
+                 'figureA6', ['omega']),
+    'figureA7': (_series(lines=[('u_star_endogenous', 'pink'), ('u_star_hosios', 'orange')], **_U_STAR),
+                 'figureA7', ['u_star_endogenous', 'u_star_hosios']),
+    'figureA8A': (_series(lines=[('p', 'purple'), ('p_trend', 'thin_orange')], ylim=(0, 120), step=30,
+                          ylabel='Labor-productivity index'), 'figureA8', ['p', 'p_trend']),
+    'figureA8B': (_series(lines=[('p_cycle', 'purple')], ylim=(0.94, 1.06), step=0.03,
+                          ylabel='Detrended labor productivity'), 'figureA8', ['p_cycle']),
+    'figureA9': (_series(lines=[('u_star', 'pink'), ('u_star_fluctuating', 'orange')], **_U_STAR),
+                 'figureA9', ['u_star', 'u_star_fluctuating']),
+}
+
+for _panel in 'CDEF':
+    FIGURES['figure1' + _panel] = (_draw_beveridge_curve, 'figure1CF', ['u', 'v'])
+for _panel in 'BCDEF':
+    FIGURES['figure5' + _panel] = FIGURES['figure5A']
+
+# table name -> (sheet, columns, headers)
+TABLES = {
+    'figure1A': ('Figure 1A', ['u'], ['Unemployment rate']),
+    'figure1B': ('Figure 1B', ['v'], ['Vacancy rate']),
+    'figure1CF': ('Figures 1C-1F', ['log_u', 'log_v'], ['Log unemployment rate', 'Log vacancy rate']),
+    'figure5': ('Structural breaks', ['u', 'v', 'branch'], []),
+    'figure6': ('Figure 6', ['E', 'LB', 'UB'],
+                ['Beveridge elasticity', 'Low end of 95% confidence interval for Beveridge elasticity',
+                 'High end of 95% confidence interval for Beveridge elasticity']),
+    'figure7A': ('Figure 7A', ['theta', 'theta_star'], ['Labor-market tightness', 'Efficient labor-market tightness']),
+    'figure7B': ('Figure 7B', ['u', 'u_star'], ['Unemployment rate', 'Efficient unemployment rate']),
+    'figure7C': ('Figure 7C', ['gap'], ['Unemployment gap']),
+    'figure7D': ('Figure 7D', ['u_star', 'natural', 'trend', 'nairu'],
+                 ['Efficient unemployment rate', 'Natural unemployment rate', 'Trend unemployment rate', 'NAIRU']),
+    'figure8A': ('Figure 8A', ['u', 'u_star', 'u_star_lb', 'u_star_ub'],
+                 ['Unemployment rate', 'Efficient unemployment rate',
+                  'Efficient unemployment rate with low Beveridge elasticity',
+                  'Efficient unemployment rate with high Beveridge elasticity']),
+    'figure8B': ('Figure 8B', ['u', 'u_star', 'u_star_zeta_low', 'u_star_zeta_high'],
+                 ['Unemployment rate', 'Efficient unemployment rate',
+                  'Efficient unemployment rate with low social value of nonwork',
+                  'Efficient unemployment rate with high social value of nonwork']),
+    'figure8C': ('Figure 8C', ['u', 'u_star', 'u_star_kappa_low', 'u_star_kappa_high'],
+                 ['Unemployment rate', 'Efficient unemployment rate',
+                  'Efficient unemployment rate with low recruiting cost',
+                  'Efficient unemployment rate with high recruiting cost']),
+    'figure9A': ('Figure 9A', ['epsilon_star', 'E', 'LB', 'UB'],
+                 ['Inverse-optimum Beveridge elasticity', 'Calibrated Beveridge elasticity',
+                  'Low-end calibration of Beveridge elasticity', 'High-end calibration of Beveridge elasticity']),
+    'figure9B': ('Figure 9B', ['zeta_star', 'zeta', 'zeta_low', 'zeta_high'],
+                 ['Inverse-optimum social value of nonwork', 'Calibrated social value of nonwork',
+                  'Low-end calibration of social value of nonwork', 'High-end calibration of social value of nonwork']),
+    'figure9C': ('Figure 9C', ['kappa_star', 'kappa', 'kappa_low', 'kappa_high'],
+                 ['Inverse-optimum recruiting cost', 'Calibrated recruiting cost',
+                  'Low-end calibration of recruiting cost', 'High-end calibration of recruiting cost']),
+    'figure10': ('Figure 10', ['u', 'u_star_hm'], ['Unemployment rate', 'Efficient unemployment rate']),
+    'figureA1': ('Figure A1', ['f'], ['Quarterly job-finding rate']),
+    'figureA2': ('Figure A2', ['lambda'], ['Quarterly job-separation rate']),
+    'figureA3': ('Figure A3', ['u', 'u_beveridgean'], ['Unemployment rate', 'Beveridgean unemployment rate']),
+    'figureA4': ('Figure A4', ['eta'], ['Matching elasticity']),
+    'figureA5': ('Figure A5', ['u_star', 'u_star_endogenous'],
+                 ['Efficient unemployment rate with exogenous Beveridge elasticity',
+                  'Efficient unemployment rate with endogenous Beveridge elasticity']),
+    'figureA6': ('Figure A6', ['omega'], ['Quarterly matching efficacy']),
+    'figureA7': ('Figure A7', ['u_star_endogenous', 'u_star_hosios'],
+                 ['Beveridgean efficient unemployment rate', 'Hosiosian efficient unemployment rate']),
+    'figureA8': ('Figure A8', ['p', 'p_trend', 'p_cycle'],
+                 ['Labor productivity', 'Trend labor productivity', 'Detrended labor productivity']),
+    'figureA9': ('Figure A9', ['u_star', 'u_star_fluctuating'],
+                 ['Efficient unemployment rate with constant social value of nonwork',
+                  'Efficient unemployment rate with fluctuating social value of nonwork']),
+}
@@ -0,0 +1,260 @@
+import datetime
+import io
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .data import get_cache_dir, _map_entry, _read_meta, _write_entry, _write_meta
+from .instrument import instrumented
+
+## functions:
+
+### fetch: fetch_fred_series
+### vintage store: load_fred_vintage, list_fred_vintages
+
+
+# the base URL can point to a local stand-in server, e.g. for testing
+FRED_BASE_URL = 'https://fred.stlouisfed.org'
+
+_CSV_PATH = '/graph/fredgraph.csv'
+
+
+###############################################################
+@instrumented
+def fetch_fred_series(series_ids, start='1951-01-01', vintage_date=None, base_url=None, cache_dir=None,
+                      offline=None, max_workers=8, timeout=30., frequency=None):
+    '''
+    This function downloads FRED (or ALFRED, when vintage_date is given) series concurrently
+    over a pooled HTTP session, and stores each vintage in the local cache. Requests for the
+    latest data are revalidated with ETag/Last-Modified, so unchanged series are not downloaded
+    again. In offline mode, or when the server cannot be reached, series are served from the
+    local vintage store.
+
+    Parameters
+    -----------
+    series_ids: str or list of str
+        FRED series ids, e.g. ['USREC', 'UNRATE', 'CLF16OV', 'JTSJOL'].
+    start: str, optional
+        First observation date. Default '1951-01-01'. The vintage store keeps every
+        observation of each vintage, whatever the start of the request.
+    vintage_date: str, optional
+        Return the data as they were published on that date (ALFRED). Default is the latest data.
+    base_url: str, optional
+        Server URL. Defaults to the BUG_FRED_URL environment variable, or FRED_BASE_URL.
+    cache_dir: str or Path, optional
+        Location of the local cache. See bug.data.get_cache_dir.
+    offline: bool, optional
+        Serve everything from the vintage store. Defaults to True if the environment
+        variable BUG_OFFLINE is set to 1.
+    max_workers: int, optional
+        Number of concurrent downloads. Default 8.
+    timeout: float, optional
+        Timeout in seconds of each request. Default 30.
+    frequency: str or dict, optional
+        Frequency of the series as a pandas period alias, e.g. 'M' or 'Q', or a dict of them
+        keyed by series id. Default is inferred from the dates; it must be given for series
+        with 2 observations or less.
+
+    Returns
+    --------
+    dict of pd.Series
+        The series with a PeriodIndex, keyed by series id. The vintage of each series is
+        stored in its attrs['vintage'].
+    '''
+
+    if isinstance(series_ids, str):
+        series_ids = [series_ids]
+
+    series_ids = list(dict.fromkeys(series_ids))
+
+    if offline is None:
+        offline = os.environ.get('BUG_OFFLINE', '0') == '1'
+
+    if vintage_date is not None:
+        vintage_date = pd.Timestamp(vintage_date).strftime('%Y-%m-%d')
+
+    if offline:
+        return {sid: _load_stored(sid, vintage_date, cache_dir, start) for sid in series_ids}
+
+    if base_url is None:
+        base_url = os.environ.get('BUG_FRED_URL', FRED_BASE_URL)
+
+    import requests
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {sid: pool.submit(_fetch_one, session, base_url.rstrip('/'), sid, start,
+                                        vintage_date, cache_dir, timeout,
+                                        frequency.get(sid) if isinstance(frequency, dict) else frequency)
+                       for sid in series_ids}
+
+            return {sid: fut.result() for sid, fut in futures.items()}
+
+
+###############################################################
+def list_fred_vintages(series_id, cache_dir=None):
+    '''
+    Return the sorted list of vintages (as 'YYYY-MM-DD' strings) of a FRED series
+    held in the local vintage store.
+    '''
+
+    root = _series_dir(series_id, cache_dir)
+
+    if not root.exists():
+        return []
+
+    return sorted(p.parent.name for p in root.glob('*/meta.json'))
+
+
+###############################################################
+def load_fred_vintage(series_id, vintage=None, cache_dir=None):
+    '''
+    This function returns a FRED series from the local vintage store, without network access.
+
+    Parameters
+    -----------
+    series_id: str
+        FRED series id.
+    vintage: str, optional
+        Return the latest vintage published on or before this date. Default is the latest
+        stored vintage.
+    cache_dir: str or Path, optional
+        Location of the local cache. See bug.data.get_cache_dir.
+
+    Returns
+    --------
+    pd.Series
+        Read-only series with a PeriodIndex.
+    '''
+
+    if vintage is not None:
+        vintage = pd.Timestamp(vintage).strftime('%Y-%m-%d')
+
+    return _load_stored(series_id, vintage, cache_dir)
+
+
+
+###############################################################
+def _series_dir(series_id, cache_dir):
+
+    return get_cache_dir(cache_dir) / 'fred' / series_id.upper()
+
+
+###############################################################
+def _load_stored(series_id, vintage_date, cache_dir, start=None):
+    # latest stored vintage on or before vintage_date
+
+    vintages = list_fred_vintages(series_id, cache_dir)
+
+    if vintage_date is not None:
+        vintages = [v for v in vintages if v <= vintage_date]
+
+    if not vintages:
+        raise KeyError('no stored vintage of FRED series {}{}.'.format(
+            series_id, '' if vintage_date is None else ' on or before ' + vintage_date))
+
+    return _map_vintage(series_id, vintages[-1], cache_dir, start)
+
+
+###############################################################
+def _map_vintage(series_id, vintage, cache_dir, start=None):
+
+    entry = _series_dir(series_id, cache_dir) / vintage
+    # a new Series over the mapped values: the attrs of the cached one are left alone
+    series = _map_entry(entry, _read_meta(entry)).copy(deep=False)
+
+    if start is not None:
+        # observations dated on or after start, as fredgraph.csv?cosd=start
+        series = series.iloc[series.index.start_time.searchsorted(pd.Timestamp(start)):]
+
+    series.attrs['vintage'] = vintage
+
+    return series
+
+
+###############################################################
+def _fetch_one(session, base_url, series_id, start, vintage_date, cache_dir, timeout, frequency=None):
+
+    import requests
+
+    root = _series_dir(series_id, cache_dir)
+
+    # published vintages never change, so a stored one is served as is
+    if vintage_date is not None and vintage_date in list_fred_vintages(series_id, cache_dir):
+        return _map_vintage(series_id, vintage_date, cache_dir, start)
+
+    # every observation is downloaded and stored, and the series is cut at start on
+    # read, so that each stored vintage serves requests with any start
+    params = {'id': series_id}
+    headers = {}
+    validators = {}
+
+    if vintage_date is not None:
+        params['vintage_date'] = vintage_date
+    else:
+        validators = _read_meta(root) or {}
+        if validators.get('vintage') in list_fred_vintages(series_id, cache_dir):
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+    try:
+        response = session.get(base_url + _CSV_PATH, params=params, headers=headers, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout) as err:
+        warnings.warn('cannot reach {} ({}), using the local vintage store for {}.'.format(base_url, err, series_id))
+        return _load_stored(series_id, vintage_date, cache_dir, start)
+
+    if response.status_code == 304:
+        if validators.get('vintage'):
+            return _map_vintage(series_id, validators['vintage'], cache_dir, start)
+        return _load_stored(series_id, vintage_date, cache_dir, start)
+
+    response.raise_for_status()
+
+    series = _parse_csv(response.content, series_id, frequency)
+
+    if vintage_date is not None:
+        vintage = vintage_date
+    elif 'Last-Modified' in response.headers:
+        vintage = pd.Timestamp(response.headers['Last-Modified']).strftime('%Y-%m-%d')
+    else:
+        vintage = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d')
+
+    _write_entry(root / vintage, series, [], 0)
+
+    if vintage_date is None:
+        root.mkdir(parents=True, exist_ok=True)
+        _write_meta(root, {'vintage': vintage,
+                           'etag': response.headers.get('ETag'),
+                           'last_modified': response.headers.get('Last-Modified')})
+
+    return _map_vintage(series_id, vintage, cache_dir, start)
+
+
+###############################################################
+def _parse_csv(content, series_id, frequency=None):
+    # fredgraph.csv: a date column and one value column, with '.' for missing values
+
+    df = pd.read_csv(io.BytesIO(content), na_values='.')
+
+    dates = pd.DatetimeIndex(pd.to_datetime(df.iloc[:, 0]).to_numpy())
+
+    if frequency is not None:
+        index = dates.to_period(frequency)
+    else:
+        try:
+            index = pd.DatetimeIndex(dates, freq='infer').to_period()
+        except (TypeError, ValueError):
+            index = None
+        if index is None or index.freq is None:
+            raise ValueError('cannot infer the frequency of FRED series {} from {} observations; give it with '
+                             'frequency=.'.format(series_id, len(dates)))
+
+    return pd.Series(data=pd.to_numeric(df.iloc[:, 1]).to_numpy(dtype=float), index=index, name=series_id)
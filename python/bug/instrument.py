@@ -0,0 +1,280 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+## functions:
+
+### recording: profile, enable_profiling, disable_profiling, Recorder
+### hooks: instrumented, stage, count
+
+
+# the active Recorder, or None when instrumentation is disabled; the hooks
+# below only check this global, so they cost next to nothing when disabled
+_RECORDER = None
+
+_NULL = nullcontext()
+
+
+###############################################################
+@contextmanager
+def profile(trace_allocations=False):
+    '''
+    Context manager recording the wall time, call counts, counters (OLS fits, root
+    solves, dynamic-program cells) and optionally the memory allocations of the bug
+    functions and stages run inside it.
+
+        with bug.profile() as rec:
+            bug.run_gap_pipeline(inputs, efficiency=True)
+        rec.to_dict()
+        rec.to_chrome_trace('trace.json')
+
+    Parameters
+    -----------
+    trace_allocations: bool, optional
+        Whether to record the net memory allocated by each call, with tracemalloc.
+        This slows the code down noticeably. Default False.
+
+    Returns
+    --------
+    Recorder
+        The recorded events.
+    '''
+
+    recorder = enable_profiling(trace_allocations)
+
+    try:
+        yield recorder
+    finally:
+        disable_profiling(recorder)
+
+
+###############################################################
+def enable_profiling(trace_allocations=False):
+    '''
+    Start recording globally and return the Recorder. See profile.
+    '''
+
+    global _RECORDER
+
+    recorder = Recorder(trace_allocations=trace_allocations, parent=_RECORDER)
+    _RECORDER = recorder
+
+    return recorder
+
+
+###############################################################
+def disable_profiling(recorder=None):
+    '''
+    Stop recording (the given recorder, or the active one), and return it.
+    '''
+
+    global _RECORDER
+
+    recorder = _RECORDER if recorder is None else recorder
+
+    if recorder is not None:
+        recorder._stop()
+        if _RECORDER is recorder:
+            _RECORDER = recorder._parent
+
+    return recorder
+
+
+###############################################################
+def instrumented(fn):
+    '''
+    Decorator recording each call of fn while a Recorder is active.
+    '''
+
+    name = fn.__name__
+    category = fn.__module__.rpartition('.')[2]
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+
+        if _RECORDER is None:
+            return fn(*args, **kwargs)
+
+        with _RECORDER.span(name, category):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+###############################################################
+def stage(name):
+    '''
+    Context manager recording a named stage (e.g. 'resample') while a Recorder is active.
+    '''
+
+    if _RECORDER is None:
+        return _NULL
+
+    return _RECORDER.span(name, 'stage')
+
+
+###############################################################
+def count(name, n=1):
+    '''
+    Add n to the counter name (e.g. 'ols_fits') while a Recorder is active.
+    '''
+
+    if _RECORDER is not None:
+        _RECORDER.add(name, n)
+
+
+###############################################
+class Recorder():
+    """
+    Class holding the events recorded by profile
+
+    Attributes
+    ----------
+    events: list of dict
+        One event per call or stage: name, category, start and duration (s), thread,
+        and allocated bytes if traced.
+    counters: dict
+        Counters, e.g. 'ols_fits', 'root_solves', 'dp_cells'.
+    trace_allocations: bool
+        Whether allocations are traced.
+
+    A recorder started while another one is active (nested profile calls) also passes
+    its events and counters on to the outer one.
+    """
+
+    def __init__(self, trace_allocations=False, parent=None):
+
+        self.events = []
+        self.counters = defaultdict(int)
+        self.trace_allocations = trace_allocations
+
+        self._parent = parent
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._started_tracemalloc = False
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    @contextmanager
+    def span(self, name, category):
+
+        chain = self._chain()
+        traced = any(rec.trace_allocations for rec in chain)
+
+        mem0 = tracemalloc.get_traced_memory()[0] if traced else None
+        t0 = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            t1 = time.perf_counter()
+            alloc = tracemalloc.get_traced_memory()[0] - mem0 if traced else None
+            tid = threading.get_ident()
+
+            for rec in chain:
+                event = {'name': name, 'cat': category, 'start': t0 - rec._t0, 'dur': t1 - t0, 'tid': tid}
+                if rec.trace_allocations:
+                    event['alloc_bytes'] = alloc
+
+                with rec._lock:
+                    rec.events.append(event)
+
+    def add(self, name, n=1):
+
+        for rec in self._chain():
+            with rec._lock:
+                rec.counters[name] += n
+
+    def summary(self):
+        '''
+        Return the calls, total, mean and max wall time (ms) and net allocations of each
+        function and stage, keyed by category then name.
+        '''
+
+        out = defaultdict(dict)
+
+        for ev in self.events:
+            s = out[ev['cat']].setdefault(ev['name'], {'calls': 0, 'total_ms': 0., 'max_ms': 0.})
+            s['calls'] += 1
+            s['total_ms'] += 1000*ev['dur']
+            s['max_ms'] = max(s['max_ms'], 1000*ev['dur'])
+            if 'alloc_bytes' in ev:
+                s['alloc_bytes'] = s.get('alloc_bytes', 0) + ev['alloc_bytes']
+
+        for cat in out.values():
+            for s in cat.values():
+                s['mean_ms'] = s['total_ms'] / s['calls']
+
+        return dict(out)
+
+    def to_dict(self, events=False):
+        '''
+        Return the summary and counters (and the raw events if events=True) as a dict.
+        '''
+
+        out = {'summary': self.summary(), 'counters': dict(self.counters)}
+
+        if events:
+            out['events'] = list(self.events)
+
+        return out
+
+    def to_json(self, path=None, events=False):
+        '''
+        Return to_dict as a JSON string, and write it to path if given.
+        '''
+
+        text = json.dumps(self.to_dict(events=events), indent=1)
+
+        if path is not None:
+            with open(path, 'w') as fh:
+                fh.write(text)
+
+        return text
+
+    def to_chrome_trace(self, path=None):
+        '''
+        Return the events in the Chrome trace event format (chrome://tracing, Perfetto),
+        and write them to path if given.
+        '''
+
+        pid = os.getpid()
+
+        trace = [{'name': ev['name'], 'cat': ev['cat'], 'ph': 'X', 'pid': pid, 'tid': ev['tid'],
+                  'ts': 1e6*ev['start'], 'dur': 1e6*ev['dur'],
+                  'args': {'alloc_bytes': ev['alloc_bytes']} if 'alloc_bytes' in ev else {}}
+                 for ev in self.events]
+
+        end = max([ev['start'] + ev['dur'] for ev in self.events], default=0.)
+        trace.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'ts': 1e6*end, 'args': dict(self.counters)})
+
+        out = {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+        if path is not None:
+            with open(path, 'w') as fh:
+                json.dump(out, fh)
+
+        return out
+
+    def _chain(self):
+        # this recorder and the ones it was nested in
+
+        chain, rec = [], self
+        while rec is not None:
+            chain.append(rec)
+            rec = rec._parent
+
+        return chain
+
+    def _stop(self):
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
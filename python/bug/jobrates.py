@@ -2,11 +2,14 @@ import numpy as np
 import pandas as pd
 from scipy.optimize import root
 
+from .instrument import instrumented, count, stage
+
 ## functions:
 
 ### compute_job_finding_rate, compute_job_separation_rate, 
 
 ###############################################################
+@instrumented
 def compute_job_finding_rate(u_level, u_short, quarterly=True, adjust_short=True):    
     '''
     The function measures the job-finding rate from the unemployment level and short-term 
@@ -46,7 +49,8 @@ def compute_job_finding_rate(u_level, u_short, quarterly=True, adjust_short=True
     
     if quarterly:
         # monthly to quarterly
-        rate = rate.resample('Q').sum()
+        with stage('resample'):
+            rate = rate.resample('Q').sum()
 
     return rate
     
@@ -65,6 +69,7 @@ def _job_sep_expr(lambda_rate, *inputs):
     
 
 ###############################################################
+@instrumented
 def compute_job_separation_rate(u_level, ushort_level, h_level, quarterly=True, adjust_short=True):    
     '''
     The function measures the job-separation rate lambda, from the unemployment level 
@@ -96,12 +101,14 @@ def compute_job_separation_rate(u_level, ushort_level, h_level, quarterly=True,
     # use scipy.optimize.root to solve (setting root guess as 0.0)
     # calculate each month with a list comprehension
     rate = [root(_job_sep_expr, 0.0, (find_rate.loc[t], u_level.loc[t], u_level.shift(-1).loc[t], h_level.loc[t])).x[0] for t in u_level.index]
+    count('root_solves', len(rate))
     
     rate = pd.Series(data=rate, index=u_level.index, name='job_sep_lambda')
         
     if quarterly:
         # monthly to quarterly
-        rate = rate.resample('Q').sum()
+        with stage('resample'):
+            rate = rate.resample('Q').sum()
         
     return rate
 
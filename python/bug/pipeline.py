@@ -0,0 +1,343 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .breakpoints import compute_beveridge_elasticity, get_bp_breakpoints
+from . import instrument
+from .instrument import Recorder, instrumented, stage
+from .suffstats import compute_unemployment_gap
+
+## functions:
+
+### pipeline: run_gap_pipeline, GapResult
+### inputs/outputs: read_gap_inputs, load_cached_inputs, write_gap_result
+
+
+FLOW_COLUMNS = ['u_level', 'ushort_level', 'h_level']
+
+
+###############################################################
+@instrumented
+def run_gap_pipeline(inputs, min_size=None, n_bkps=None, zeta=0.26, kappa=0.92, efficiency=False, r=0.012,
+                     backend='native'):
+    '''
+    This function computes the Beveridgean unemployment gap from the unemployment and
+    vacancy rates, in stages: structural breaks of the Beveridge curve, Beveridge elasticity
+    in each segment, and unemployment gap. Optionally, it also computes the efficient
+    unemployment rate in the DMP model, with endogenous Beveridge elasticity and, if the
+    labor-market flows are given, with the Hosios condition.
+
+    Parameters
+    -----------
+    inputs: pd.DataFrame
+        Monthly or quarterly data with a PeriodIndex, and columns u (unemployment rate) and
+        v (vacancy rate). Monthly data are averaged to quarterly. Monthly data may also have
+        the columns u_level, ushort_level and h_level (unemployment, short-term unemployment
+        and labor-force levels) used to measure the job-finding and job-separation rates.
+    min_size: int, optional
+        Min size of the segments. Default 15% of the sample, as in Michaillat & Saez (2021).
+    n_bkps: int, optional
+        Number of breakpoints. Default 5, as in Michaillat & Saez (2021).
+    zeta: scalar, optional
+        Social value of nonwork.
+    kappa: scalar, optional
+        Recruiting cost.
+    efficiency: bool, optional
+        Whether to compute the DMP efficiency variants. Default False.
+    r: scalar, optional
+        Discount rate, for the Hosios condition.
+    backend: str, optional
+        'native' (default) or 'ruptures' (which uses ruptures and statsmodels). See
+        get_bp_breakpoints.
+
+    Returns
+    --------
+    GapResult
+        The results of each stage, and the time spent in each stage.
+    '''
+
+    if backend not in ('native', 'ruptures'):
+        raise ValueError("backend must be 'native' or 'ruptures'.")
+
+    # the stages are timed on their own recorder, which passes them on to an
+    # active bug.profile
+    timer = Recorder(parent=instrument._RECORDER)
+
+    with timer.span('aggregate', 'stage'):
+        quarterly, flows = _quarterly_inputs(inputs)
+        u, v = quarterly['u'], quarterly['v']
+        last = min(u.last_valid_index(), v.last_valid_index())
+        u, v = u.loc[:last], v.loc[:last]
+        log_u, log_v = np.log(u), np.log(v)
+
+    with timer.span('breakpoints', 'stage'):
+        # the defaults of get_bp_breakpoints, resolved so that the parameters of the
+        # run are the same whether they are given or not
+        min_size = int(0.15*len(log_v)) if min_size is None else int(min_size)
+        n_bkps = 5 if n_bkps is None else int(n_bkps)
+        bkps = get_bp_breakpoints(log_u, log_v, use_bp_defaults=False, min_size=min_size, n_bkps=n_bkps,
+                                  backend=backend)
+
+    with timer.span('elasticity', 'stage'):
+        bev_e, coeffs = compute_beveridge_elasticity(log_u, log_v, bkps_in=bkps,
+                                                     backend='native' if backend == 'native' else 'statsmodels')
+
+    with timer.span('gap', 'stage'):
+        gap = compute_unemployment_gap(u, v, epsilon=bev_e['E'], zeta=zeta, kappa=kappa)
+
+    frame = pd.DataFrame({'u': u, 'v': v}).join(bev_e)
+    frame['u_star'] = u - gap
+    frame['gap'] = gap
+
+    if efficiency:
+        _efficiency_stages(frame, flows, zeta, kappa, r, timer)
+
+    params = {'min_size': min_size, 'n_bkps': n_bkps, 'zeta': zeta, 'kappa': kappa, 'r': r,
+              'backend': backend, 'efficiency': efficiency}
+
+    timings = {name: s['total_ms'] / 1000. for name, s in timer.summary().get('stage', {}).items()}
+
+    return GapResult(frame=frame, bkps=bkps, coeffs=coeffs, params=params, timings=timings)
+
+
+###############################################################
+def read_gap_inputs(path):
+    '''
+    This function reads the inputs of run_gap_pipeline from a CSV, Parquet or JSON file.
+    The first column (or the index, for Parquet) holds the periods, as in '1951Q1',
+    '1951-01' or '1951-01-01'; the other columns are as described in run_gap_pipeline.
+
+    Parameters
+    -----------
+    path: str or Path
+        Input file, with extension .csv, .parquet or .json.
+
+    Returns
+    --------
+    pd.DataFrame
+        Inputs with a monthly or quarterly PeriodIndex.
+    '''
+
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == '.csv':
+        df = pd.read_csv(path, index_col=0)
+    elif suffix in ('.parquet', '.pq'):
+        _require_parquet()
+        df = pd.read_parquet(path)
+    elif suffix == '.json':
+        df = pd.read_json(path, orient='index', convert_axes=False)
+    else:
+        raise ValueError('unknown input format: {}'.format(path))
+
+    df.index = _to_period_index(df.index)
+
+    return df.sort_index()
+
+
+###############################################################
+def load_cached_inputs(xlsx_path=None, cache_dir=None):
+    '''
+    This function returns the inputs of run_gap_pipeline for 1951--2019 from data.xlsx,
+    through the local data cache: monthly unemployment rate, vacancy rate (spliced as in
+    getVacancyRate.m) and labor-market flows.
+    '''
+
+    from .data import load_monthly_data
+    from .splice import get_vacancy_rate
+
+    df = load_monthly_data(xlsx_path, cache_dir=cache_dir)
+    v = get_vacancy_rate(quarterly=False, xlsx_path=xlsx_path, cache_dir=cache_dir)
+
+    inputs = pd.DataFrame({'u': df['unemployment_rate'] / 100.,
+                           'v': v,
+                           'u_level': df['unemployment_level'],
+                           'ushort_level': df['short_term_unemployment_level'],
+                           'h_level': df['labor_force_level']})
+
+    # the flows run one month past u: the rates of the last month of u need the
+    # unemployment levels of the next month
+    return inputs.loc[:inputs.last_valid_index()]
+
+
+###############################################################
+def write_gap_result(result, path, fmt=None):
+    '''
+    Write the result of run_gap_pipeline to path, as CSV, Parquet or JSON (from the
+    extension of path, unless fmt is given). JSON output also holds the breakpoints,
+    the parameters and the stage timings.
+    '''
+
+    path = Path(path)
+    fmt = (fmt or path.suffix.lstrip('.')).lower()
+
+    frame = result.frame.copy()
+    frame.index = frame.index.astype(str)
+    frame.index.name = 'period'
+
+    if fmt == 'csv':
+        frame.to_csv(path)
+    elif fmt in ('parquet', 'pq'):
+        _require_parquet()
+        frame.to_parquet(path)
+    elif fmt == 'json':
+        with open(path, 'w') as fh:
+            json.dump(result.to_dict(), fh, indent=1)
+    else:
+        raise ValueError('unknown output format: {}'.format(fmt))
+
+
+###############################################
+class GapResult():
+    """
+    Class to hold results from run_gap_pipeline
+
+    Attributes
+    ----------
+    frame: pd.DataFrame
+        Quarterly u, v, Beveridge elasticity (E, SE, LB, UB), efficient unemployment u_star
+        and unemployment gap, plus the DMP efficiency variants if computed.
+    bkps: list of int
+        Breakpoint indices, starting with 0 and ending with len(frame).
+    breaks: list of pd.Period
+        First quarter of each segment after the first.
+    coeffs: list of tuples
+        Segment regression coefficients, as returned by compute_beveridge_elasticity.
+    params: dict
+        Parameters of the run, with the default min_size and n_bkps resolved.
+    timings: dict
+        Time spent in each stage, in seconds.
+    """
+
+    def __init__(self, frame, bkps, coeffs, params, timings):
+
+        self.frame = frame
+        self.bkps = bkps
+        self.breaks = [frame.index[b] for b in bkps[1:-1]]
+        self.coeffs = coeffs
+        self.params = params
+        self.timings = timings
+
+    def to_dict(self):
+
+        frame = self.frame.astype(float).replace({np.nan: None})
+
+        return {'params': self.params,
+                'bkps': [int(b) for b in self.bkps],
+                'breaks': [str(b) for b in self.breaks],
+                'timings': self.timings,
+                'series': {str(p): row for p, row in zip(frame.index, frame.to_dict(orient='records'))}}
+
+
+
+###############################################################
+def _efficiency_stages(frame, flows, zeta, kappa, r, timer):
+    # DMP efficiency variants of online appendix C and D, added as columns of frame
+
+    from .dmpmodel import (compute_matching_elasticity, compute_separation_efficacy, compute_matching_efficacy,
+                           compute_endogenous_efficiency, compute_hosios_efficiency)
+
+    u, v = frame['u'], frame['v']
+    theta = v / u
+
+    with timer.span('efficiency_endogenous', 'stage'):
+        eta = compute_matching_elasticity(u, frame['E'])
+        lo = compute_separation_efficacy(u, eta, theta)
+        u_star, theta_star = compute_endogenous_efficiency(eta, lo, zeta=zeta, kappa=kappa)
+
+    frame['u_star_endogenous'] = u_star
+    frame['theta_star_endogenous'] = theta_star
+
+    if flows is None:
+        return
+
+    from .jobrates import compute_job_finding_rate, compute_job_separation_rate
+
+    with timer.span('job_rates', 'stage'):
+        # the job-rate functions resample a monthly DatetimeIndex
+        flows = flows.copy()
+        flows.index = flows.index.to_timestamp()
+        f = compute_job_finding_rate(flows['u_level'], flows['ushort_level'], quarterly=False)
+        lamb = compute_job_separation_rate(flows['u_level'], flows['ushort_level'], flows['h_level'], quarterly=False)
+        # the root solve of a month with missing levels returns its starting point, 0
+        lamb = lamb.where(f.notna() & flows['h_level'].notna())
+        # quarterly sums of the monthly rates; a quarter with a missing month is missing,
+        # not the sum of the other months
+        with stage('resample'):
+            f, lamb = f.resample('Q').sum(min_count=3), lamb.resample('Q').sum(min_count=3)
+        f.index, lamb.index = f.index.to_period('Q'), lamb.index.to_period('Q')
+        f, lamb = f.reindex(frame.index), lamb.reindex(frame.index)
+
+    with timer.span('efficiency_hosios', 'stage'):
+        omega = compute_matching_efficacy(f, theta, eta)
+        # drop the quarters where the flows cannot be measured (e.g. the last one)
+        valid = (f.notna() & lamb.notna()).to_numpy()
+        u_hosios, theta_hosios = compute_hosios_efficiency(eta[valid], lamb[valid], omega[valid],
+                                                           u0=u.iloc[0], r=r, zeta=zeta, kappa=kappa)
+
+    frame['f'] = f
+    frame['lambda'] = lamb
+    frame['u_star_hosios'] = u_hosios
+    frame['theta_star_hosios'] = pd.Series(theta_hosios, index=frame.index[valid])
+
+
+###############################################################
+def _quarterly_inputs(inputs):
+    # quarterly u and v, and the monthly flows if any
+
+    if not isinstance(inputs.index, pd.PeriodIndex):
+        inputs = inputs.copy()
+        inputs.index = _to_period_index(inputs.index)
+
+    missing = [c for c in ('u', 'v') if c not in inputs.columns]
+    if missing:
+        raise ValueError('inputs must have the columns u and v.')
+
+    has_flows = all(c in inputs.columns for c in FLOW_COLUMNS)
+
+    if inputs.index.freqstr == 'M':
+        from .splice import monthly_to_quarterly
+        quarterly = monthly_to_quarterly(inputs[['u', 'v']])
+        flows = inputs[FLOW_COLUMNS] if has_flows else None
+    elif inputs.index.freqstr.startswith('Q'):
+        if has_flows:
+            raise ValueError('labor-market flows must be given with monthly inputs.')
+        quarterly, flows = inputs[['u', 'v']], None
+    else:
+        raise ValueError('inputs must be monthly or quarterly.')
+
+    return quarterly, flows
+
+
+###############################################################
+def _to_period_index(index):
+    # PeriodIndex from period strings ('1951Q1', '1951-01') or dates
+
+    if isinstance(index, pd.PeriodIndex):
+        return index
+
+    labels = index.astype(str)
+
+    if labels.str.contains('Q').all():
+        return pd.PeriodIndex(labels, freq='Q')
+
+    dates = pd.DatetimeIndex(pd.to_datetime(labels))
+    freq = pd.infer_freq(dates) if len(dates) > 2 else None
+
+    if freq is not None and freq.startswith('Q'):
+        return dates.to_period('Q')
+
+    return dates.to_period('M')
+
+
+###############################################################
+def _require_parquet():
+    # Parquet files are optional, and need pyarrow (or fastparquet)
+
+    if importlib.util.find_spec('pyarrow') is None and importlib.util.find_spec('fastparquet') is None:
+        raise ImportError('reading or writing Parquet files requires pyarrow: pip install pyarrow, '
+                          'or use CSV or JSON.')
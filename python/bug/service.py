@@ -0,0 +1,410 @@
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+## functions:
+
+### service: GapService, serve
+
+
+###############################################
+class GapService():
+    """
+    Long-lived service computing the Beveridgean unemployment gap for different
+    settings of zeta, kappa, min_size and n_bkps, over data loaded once.
+
+    The breakpoint and elasticity estimations run in a process pool, so that the event
+    loop stays responsive. Their results are kept in memory: the dynamic program for
+    a given min_size gives the breakpoints for every number of breaks up to the largest
+    one requested, and the elasticities are kept per set of breakpoints. Concurrent
+    requests with identical settings share a single computation.
+
+    Attributes
+    ----------
+    inputs: pd.DataFrame
+        Quarterly u and v.
+    metrics: dict
+        Request counts, latencies and cache hits. See the /metrics endpoint.
+    """
+
+    def __init__(self, inputs, workers=2, cache_size=256):
+
+        from .pipeline import _quarterly_inputs
+
+        quarterly, _ = _quarterly_inputs(inputs)
+        last = min(quarterly['u'].last_valid_index(), quarterly['v'].last_valid_index())
+
+        self.inputs = quarterly.loc[:last]
+        self._signal = np.column_stack((np.log(self.inputs['v'].to_numpy()), np.log(self.inputs['u'].to_numpy()),
+                                        np.ones(len(self.inputs))))
+
+        # forked workers would inherit the sockets open at the time of the fork (e.g. the
+        # connection of the request that started them), and keep them open
+        methods = multiprocessing.get_all_start_methods()
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(
+            'forkserver' if 'forkserver' in methods else 'spawn'))
+        self._workers = workers
+        self._cache_size = cache_size
+
+        # min_size -> breakpoint lists for 0, 1, ... breaks
+        self._bkps = {}
+        # tuple of breakpoints -> (elasticity frame, coeffs)
+        self._elasticity = OrderedDict()
+        # request key -> response
+        self._responses = OrderedDict()
+        # request key -> future of the response being computed
+        self._inflight = {}
+
+        self.metrics = {'requests': 0, 'errors': 0, 'coalesced': 0,
+                        'cache': {'response': [0, 0], 'breakpoints': [0, 0], 'elasticity': [0, 0]},
+                        'latency_ms': {}}
+        self._latencies = {}
+
+    async def start(self):
+        '''
+        Start the worker processes and import the estimation code in them, so that the
+        first requests do not wait for it.
+        '''
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _warm_up) for _ in range(self._workers)])
+
+    async def gap(self, zeta=0.26, kappa=0.92, min_size=None, n_bkps=None, series=False):
+        '''
+        Return the unemployment gap response (a dict) for the given settings.
+        min_size and n_bkps default to the Michaillat & Saez (2021) values. Settings
+        that do not fit the sample raise a ValueError.
+        '''
+
+        t = len(self.inputs)
+        min_size = int(0.15*t) if min_size is None else int(min_size)
+        n_bkps = 5 if n_bkps is None else int(n_bkps)
+
+        if min_size < 3:
+            raise ValueError('min_size must be at least 3.')
+        if n_bkps < 0:
+            raise ValueError('n_bkps must be non-negative.')
+        if (n_bkps + 1)*min_size > t:
+            raise ValueError('{} breakpoints with min_size={} need at least {} quarters, the sample has {}.'.format(
+                n_bkps, min_size, (n_bkps + 1)*min_size, t))
+
+        key = (float(zeta), float(kappa), min_size, n_bkps, bool(series))
+
+        if key in self._responses:
+            self._hit('response', True)
+            self._responses.move_to_end(key)
+            return self._responses[key]
+
+        if key in self._inflight:
+            self.metrics['coalesced'] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self._hit('response', False)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            response = await self._compute(*key)
+        except Exception as err:
+            future.set_exception(err)
+            # retrieved by the coalesced requests, if any
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            self._remember(self._responses, key, response)
+            return response
+        finally:
+            del self._inflight[key]
+
+    async def _compute(self, zeta, kappa, min_size, n_bkps, series):
+
+        from .suffstats import compute_unemployment_gap
+
+        bkps = await self._breakpoints(min_size, n_bkps)
+        bev_e, coeffs = await self._elasticities(bkps)
+
+        u, v = self.inputs['u'], self.inputs['v']
+        gap = compute_unemployment_gap(u, v, epsilon=bev_e['E'], zeta=zeta, kappa=kappa)
+
+        last = self.inputs.index[-1]
+
+        response = {'params': {'zeta': zeta, 'kappa': kappa, 'min_size': min_size, 'n_bkps': n_bkps},
+                    'breaks': [str(self.inputs.index[b]) for b in bkps[1:-1]],
+                    'latest': {'period': str(last), 'u': float(u.iloc[-1]), 'v': float(v.iloc[-1]),
+                               'E': float(bev_e['E'].iloc[-1]), 'u_star': float(u.iloc[-1] - gap.iloc[-1]),
+                               'gap': float(gap.iloc[-1])}}
+
+        if series:
+            response['series'] = {str(p): float(g) for p, g in gap.items()}
+
+        return response
+
+    async def _breakpoints(self, min_size, n_bkps):
+        # breakpoints from the warm dynamic-program results, or a new run in the pool
+
+        known = self._bkps.get(min_size)
+
+        if known is not None and len(known) > n_bkps:
+            self._hit('breakpoints', True)
+            return known[n_bkps]
+
+        self._hit('breakpoints', False)
+
+        loop = asyncio.get_running_loop()
+        bps_list = await loop.run_in_executor(self._pool, _solve_dynp, self._signal, n_bkps, min_size)
+
+        if len(self._bkps.get(min_size, ())) < len(bps_list):
+            self._bkps[min_size] = bps_list
+
+        return bps_list[n_bkps]
+
+    async def _elasticities(self, bkps):
+
+        key = tuple(bkps)
+
+        if key in self._elasticity:
+            self._hit('elasticity', True)
+            self._elasticity.move_to_end(key)
+            return self._elasticity[key]
+
+        self._hit('elasticity', False)
+
+        loop = asyncio.get_running_loop()
+        coeffs = await loop.run_in_executor(self._pool, _fit_segments, self._signal, list(bkps))
+
+        bev_e = pd.DataFrame(np.nan, index=self.inputs.index, columns=['E', 'SE', 'LB', 'UB'])
+        for idx, a in enumerate(coeffs):
+            bev_e.iloc[bkps[idx]:bkps[idx+1]] = [a[0], a[1], a[0] - 1.96*a[1], a[0] + 1.96*a[1]]
+
+        self._remember(self._elasticity, key, (bev_e, coeffs))
+
+        return bev_e, coeffs
+
+    def _remember(self, cache, key, value):
+        # LRU insertion
+
+        cache[key] = value
+        cache.move_to_end(key)
+
+        while len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+    def _hit(self, cache, hit):
+
+        self.metrics['cache'][cache][0 if hit else 1] += 1
+
+    def record(self, endpoint, seconds, error=False):
+        '''
+        Record the latency of a request to endpoint.
+        '''
+
+        self.metrics['requests'] += 1
+        self.metrics['errors'] += int(error)
+        self._latencies.setdefault(endpoint, deque(maxlen=1000)).append(1000*seconds)
+
+    def snapshot(self):
+        '''
+        Return the metrics, with the latency percentiles (ms) over the last 1000 requests
+        to each endpoint, and the cache hit counts.
+        '''
+
+        latency = {}
+        for endpoint, values in self._latencies.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            latency[endpoint] = {'count': len(values), 'p50': p50, 'p90': p90, 'p99': p99, 'max': max(values)}
+
+        cache = {name: {'hits': h, 'misses': m} for name, (h, m) in self.metrics['cache'].items()}
+
+        return {'requests': self.metrics['requests'], 'errors': self.metrics['errors'],
+                'coalesced': self.metrics['coalesced'], 'inflight': len(self._inflight),
+                'cache': cache, 'latency_ms': latency}
+
+    def close(self):
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+###############################################################
+def serve(inputs=None, host='127.0.0.1', port=8050, workers=2):
+    '''
+    This function runs the gap service as a local HTTP/JSON server, until interrupted.
+
+    Endpoints:
+        GET /gap?zeta=0.26&kappa=0.92&min_size=41&n_bkps=5&series=1
+        GET /metrics
+        GET /health
+
+    Parameters
+    -----------
+    inputs: pd.DataFrame, optional
+        Monthly or quarterly u and v, as in run_gap_pipeline. Defaults to the 1951--2019
+        data of data.xlsx, from the local data cache.
+    host: str, optional
+        Address to listen on. Default '127.0.0.1'.
+    port: int, optional
+        Port to listen on. Default 8050.
+    workers: int, optional
+        Number of processes for the estimations. Default 2.
+    '''
+
+    if inputs is None:
+        from .pipeline import load_cached_inputs
+        inputs = load_cached_inputs()
+
+    service = GapService(inputs, workers=workers)
+
+    try:
+        asyncio.run(_serve(service, host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+
+###############################################################
+def _warm_up():
+    # runs in a pool process
+
+    from . import breakpoints  # noqa: F401
+
+
+###############################################################
+def _solve_dynp(signal, n_bkps, min_size):
+    # runs in a pool process; the segment costs of the signal stay warm in the process
+
+    from .breakpoints import _dynp
+
+    return _dynp(_segment_cost(signal), n_bkps, min_size)
+
+
+###############################################################
+def _fit_segments(signal, bkps):
+    # runs in a pool process: elasticity coeffs of each segment, as in compute_beveridge_elasticity
+
+    from .breakpoints import _calc_hac_lag, _ols_hac
+
+    coeffs = []
+
+    for idx, b in enumerate(bkps[:-1]):
+        params, bse, _, _ = _ols_hac(signal[b:bkps[idx+1], 0], signal[b:bkps[idx+1], 1:], _calc_hac_lag(bkps[idx+1] - b))
+        coeffs.append((- params[0], bse[0], params[1]))
+
+    return coeffs
+
+
+_COSTS = {}
+
+###############################################################
+def _segment_cost(signal):
+
+    from .breakpoints import _SegmentCost
+
+    key = signal.tobytes()
+
+    if key not in _COSTS:
+        _COSTS.clear()
+        _COSTS[key] = _SegmentCost(signal)
+
+    return _COSTS[key]
+
+
+###############################################################
+async def _serve(service, host, port):
+
+    await service.start()
+
+    server = await asyncio.start_server(lambda r, w: _handle(service, r, w), host, port)
+
+    print('serving the Beveridgean unemployment gap on http://{}:{}'.format(host, port), flush=True)
+
+    async with server:
+        await server.serve_forever()
+
+
+###############################################################
+async def _handle(service, reader, writer):
+    # minimal HTTP/1.1: GET requests, with keep-alive
+
+    try:
+        while True:
+            request = await reader.readline()
+            if not request:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            t0 = time.perf_counter()
+            status, body, endpoint = await _route(service, request.decode('latin-1'))
+            service.record(endpoint, time.perf_counter() - t0, error=status >= 400)
+
+            payload = json.dumps(body).encode()
+            keep_alive = headers.get('connection', '').lower() != 'close'
+
+            writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                         'Connection: {}\r\n\r\n'.format(status, _REASONS[status], len(payload),
+                                                         'keep-alive' if keep_alive else 'close').encode())
+            writer.write(payload)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+###############################################################
+async def _route(service, request):
+
+    try:
+        method, target, _ = request.split(' ', 2)
+    except ValueError:
+        return 400, {'error': 'malformed request'}, 'invalid'
+
+    url = urlsplit(target)
+
+    if method != 'GET':
+        return 405, {'error': 'only GET is supported'}, url.path
+
+    if url.path == '/health':
+        return 200, {'status': 'ok'}, url.path
+
+    if url.path == '/metrics':
+        return 200, service.snapshot(), url.path
+
+    if url.path != '/gap':
+        return 404, {'error': 'unknown endpoint {}'.format(url.path)}, 'unknown'
+
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+    try:
+        kwargs = {k: float(query[k]) for k in ('zeta', 'kappa') if k in query}
+        kwargs.update({k: int(query[k]) for k in ('min_size', 'n_bkps') if k in query})
+        kwargs['series'] = query.get('series', '0').lower() in ('1', 'true', 'yes')
+    except ValueError as err:
+        return 400, {'error': str(err)}, url.path
+
+    try:
+        return 200, await service.gap(**kwargs), url.path
+    except ValueError as err:
+        return 400, {'error': str(err)}, url.path
+    except Exception as err:
+        return 500, {'error': repr(err)}, url.path
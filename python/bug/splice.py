@@ -0,0 +1,357 @@
+import numpy as np
+import pandas as pd
+
+from .data import load_monthly_data, _period_index
+from .instrument import instrumented
+
+## functions:
+
+### splice: splice_series, Splice
+### aggregation: monthly_to_quarterly
+### data: get_unemployment_rate, get_vacancy_rate
+
+
+###############################################################
+@instrumented
+def splice_series(early, late, splice_date, early_scale=1., late_scale=1., denominator=None, min_months=1):
+    '''
+    This function splices two monthly series at a given date, and returns both the spliced
+    monthly series and its quarterly average, computed in one pass over integer period codes.
+    This is how the vacancy rate is built in section 2.2: the Barnichon (2010) help-wanted
+    index up to 2000M12, then the JOLTS vacancy level divided by the labor-force level.
+
+    Parameters
+    -----------
+    early: pd.Series
+        Monthly series used before splice_date.
+    late: pd.Series
+        Monthly series used from splice_date onwards.
+    splice_date: str or pd.Period
+        First month taken from the late series, e.g. '2001-01'.
+    early_scale: scalar, optional
+        Factor applied to the early series, e.g. 0.01 to convert percent. Default 1.
+    late_scale: scalar or 'match', optional
+        Factor applied to the late series. With 'match', the late series is rescaled so that
+        its mean over the months where both series overlap before splice_date equals that
+        of the early series. Default 1.
+    denominator: pd.Series, optional
+        Monthly series dividing the late series, e.g. the labor-force level.
+    min_months: int, optional
+        Minimum number of valid months for a quarterly average. Default 1, as with
+        pandas resample('Q').mean(); use 3 to only keep complete quarters.
+
+    Returns
+    --------
+    pd.Series
+        Spliced monthly series.
+    pd.Series
+        Quarterly average of the spliced series.
+    '''
+
+    s = Splice(early, splice_date, early_scale=early_scale, min_months=min_months)
+
+    if isinstance(late_scale, str):
+        if late_scale != 'match':
+            raise ValueError("late_scale must be a scalar or 'match'.")
+        late_scale = _match_scale(s, late, denominator)
+
+    s.late_scale = late_scale
+    s.append(late, denominator=denominator)
+
+    return s.monthly, s.quarterly
+
+
+###############################################################
+@instrumented
+def monthly_to_quarterly(data, min_months=1):
+    '''
+    This function averages monthly series to convert them to quarterly series. Each
+    quarterly observation is the average of the valid monthly observations in the quarter.
+
+    Parameters
+    -----------
+    data: pd.Series, pd.DataFrame or np.ndarray
+        Monthly series with a monthly PeriodIndex or DatetimeIndex. An array must start at
+        the beginning of a quarter and stop at the end of a quarter (N-by-M, N divisible by 3),
+        as in monthlyToQuarterly.m; missing values are skipped as for series.
+    min_months: int, optional
+        Minimum number of valid months for a quarterly average. Default 1.
+
+    Returns
+    --------
+    pd.Series, pd.DataFrame or np.ndarray
+        Quarterly series, with a quarterly PeriodIndex.
+    '''
+
+    if len(data) == 0:
+        raise ValueError('monthly_to_quarterly requires at least one monthly observation.')
+
+    if isinstance(data, np.ndarray):
+        if data.shape[0] % 3 != 0:
+            raise ValueError('Number of observations must be divisible by 3.')
+        values = data.astype(float).reshape(data.shape[0] // 3, 3, *data.shape[1:])
+        valid = ~np.isnan(values)
+        return _quarter_means(np.where(valid, values, 0.).sum(axis=1), valid.sum(axis=1), min_months)
+
+    codes = _monthly_codes(data.index)
+    values = np.asarray(data, dtype=float)
+
+    q0 = codes.min() // 3
+    qidx = codes // 3 - q0
+    n_q = qidx.max() + 1
+
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.)
+
+    if values.ndim == 1:
+        sums = np.bincount(qidx, weights=filled, minlength=n_q)
+        counts = np.bincount(qidx, weights=valid, minlength=n_q)
+    else:
+        sums = np.stack([np.bincount(qidx, weights=filled[:, j], minlength=n_q) for j in range(values.shape[1])], axis=1)
+        counts = np.stack([np.bincount(qidx, weights=valid[:, j], minlength=n_q) for j in range(values.shape[1])], axis=1)
+
+    index = _period_index(np.arange(q0, q0 + n_q), 'period[Q-DEC]', data.index.name)
+
+    means = _quarter_means(sums, counts, min_months)
+
+    if values.ndim == 1:
+        return pd.Series(means, index=index, name=data.name)
+
+    return pd.DataFrame(means, index=index, columns=data.columns)
+
+
+###############################################################
+@instrumented
+def get_unemployment_rate(quarterly=True, xlsx_path=None, cache_dir=None):
+    '''
+    This function returns the US unemployment rate, 1951--2019, from data.xlsx, as a
+    fraction rather than in percent.
+
+    Parameters
+    -----------
+    quarterly: bool, optional
+        Whether to return the quarterly average of the monthly series. Default is True.
+    xlsx_path: str or Path, optional
+        Location of data.xlsx. See bug.data.load_monthly_data.
+    cache_dir: str or Path, optional
+        Location of the local cache. See bug.data.get_cache_dir.
+
+    Returns
+    --------
+    pd.Series
+        Unemployment rate.
+    '''
+
+    u = load_monthly_data(xlsx_path, cache_dir=cache_dir)['unemployment_rate']
+    u = u.loc[:u.last_valid_index()] / 100.
+
+    return monthly_to_quarterly(u) if quarterly else u
+
+
+###############################################################
+@instrumented
+def get_vacancy_rate(quarterly=True, splice_date='2001-01', xlsx_path=None, cache_dir=None):
+    '''
+    This function constructs the US vacancy rate, 1951--2019, as in getVacancyRate.m: the
+    vacancy rate of Barnichon (2010) until 2000M12, spliced with the JOLTS vacancy level
+    divided by the labor-force level from 2001M1.
+
+    Parameters
+    -----------
+    quarterly: bool, optional
+        Whether to return the quarterly average of the monthly series. Default is True.
+    splice_date: str, optional
+        First month of the JOLTS-based vacancy rate. Default '2001-01'.
+    xlsx_path: str or Path, optional
+        Location of data.xlsx. See bug.data.load_monthly_data.
+    cache_dir: str or Path, optional
+        Location of the local cache. See bug.data.get_cache_dir.
+
+    Returns
+    --------
+    pd.Series
+        Vacancy rate.
+    '''
+
+    df = load_monthly_data(xlsx_path, cache_dir=cache_dir)
+
+    v_level = df['vacancy_level']
+    v_level = v_level.loc[:v_level.last_valid_index()]
+
+    monthly, quarter = splice_series(df['vacancy_rate'], v_level, splice_date, early_scale=0.01,
+                                     denominator=df['labor_force_level'])
+
+    return quarter if quarterly else monthly
+
+
+###############################################
+class Splice():
+    """
+    Class holding a monthly series spliced from an early and a late series, together with
+    its quarterly average. Both are updated incrementally when late observations are
+    appended or revised, without recomputing the whole history.
+
+    Attributes
+    ----------
+    splice_code: int
+        Integer code (pd.Period ordinal) of the first month of the late series.
+    early_scale: float
+        Factor applied to the early series.
+    late_scale: float
+        Factor applied to the late series.
+    min_months: int
+        Minimum number of valid months for a quarterly average.
+    monthly: pd.Series
+        Spliced monthly series.
+    quarterly: pd.Series
+        Quarterly average of the spliced series.
+    """
+
+    def __init__(self, early, splice_date, early_scale=1., late_scale=1., min_months=1):
+
+        self.splice_code = pd.Period(splice_date, freq='M').ordinal
+        self.early_scale = early_scale
+        self.late_scale = late_scale
+        self.min_months = min_months
+
+        codes = _monthly_codes(early.index)
+        keep = codes < self.splice_code
+        codes = codes[keep]
+
+        self._start = codes.min() if len(codes) else self.splice_code
+        self._q0 = self._start // 3
+        self._n = 0
+
+        self._values = np.full(0, np.nan)
+        self._qsum = np.zeros(0)
+        self._qcnt = np.zeros(0)
+
+        self._set(codes, np.asarray(early, dtype=float)[keep] * early_scale)
+
+    def append(self, late, denominator=None):
+        '''
+        Add (or revise) late observations from the splice date onwards. Months before
+        the splice date are ignored.
+
+        Parameters
+        -----------
+        late: pd.Series
+            Monthly late series.
+        denominator: pd.Series, optional
+            Monthly series dividing the late series.
+        '''
+
+        codes, values = _ratio_codes(late, denominator)
+        keep = codes >= self.splice_code
+
+        self._set(codes[keep], values[keep] * self.late_scale)
+
+    @property
+    def monthly(self):
+
+        return pd.Series(self._values[:self._n].copy(),
+                         index=_period_index(np.arange(self._start, self._start + self._n), 'period[M]'))
+
+    @property
+    def quarterly(self):
+
+        n_q = (self._start + self._n - 1) // 3 - self._q0 + 1 if self._n else 0
+
+        return pd.Series(_quarter_means(self._qsum[:n_q], self._qcnt[:n_q], self.min_months),
+                         index=_period_index(np.arange(self._q0, self._q0 + n_q), 'period[Q-DEC]'))
+
+    def _set(self, codes, values):
+        # write values at the month codes, and update the quarterly sums and counts by
+        # removing the contribution of the values replaced
+
+        if not len(codes):
+            return
+
+        idx = codes - self._start
+        self._grow(idx.max() + 1)
+
+        qidx = codes // 3 - self._q0
+        n_q = len(self._qsum)
+
+        old = self._values[idx]
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(values)
+
+        self._qsum += (np.bincount(qidx, weights=np.where(new_valid, values, 0.), minlength=n_q)
+                       - np.bincount(qidx, weights=np.where(old_valid, old, 0.), minlength=n_q))
+        self._qcnt += (np.bincount(qidx, weights=new_valid, minlength=n_q)
+                       - np.bincount(qidx, weights=old_valid, minlength=n_q))
+
+        self._values[idx] = values
+        self._n = max(self._n, idx.max() + 1)
+
+    def _grow(self, n):
+        # amortized growth of the buffers, doubling their capacity
+
+        if n <= len(self._values):
+            return
+
+        cap = max(n, 2 * len(self._values))
+        n_q = (self._start + cap - 1) // 3 - self._q0 + 1
+
+        self._values = np.concatenate([self._values, np.full(cap - len(self._values), np.nan)])
+        self._qsum = np.concatenate([self._qsum, np.zeros(n_q - len(self._qsum))])
+        self._qcnt = np.concatenate([self._qcnt, np.zeros(n_q - len(self._qcnt))])
+
+
+
+###############################################################
+def _monthly_codes(index):
+    # integer month codes (pd.Period ordinals) of a monthly PeriodIndex or DatetimeIndex
+
+    if isinstance(index, pd.DatetimeIndex):
+        index = index.to_period('M')
+
+    if not isinstance(index, pd.PeriodIndex) or index.freqstr != 'M':
+        raise ValueError('series must have a monthly PeriodIndex or DatetimeIndex.')
+
+    return index.asi8
+
+
+###############################################################
+def _ratio_codes(late, denominator):
+    # month codes and values of late (divided by denominator, aligned on month codes)
+
+    codes = _monthly_codes(late.index)
+    values = np.asarray(late, dtype=float)
+
+    if denominator is None:
+        return codes, values
+
+    d_codes = _monthly_codes(denominator.index)
+    pos = np.searchsorted(d_codes, codes)
+    found = (pos < len(d_codes)) & (d_codes[np.minimum(pos, len(d_codes) - 1)] == codes)
+
+    d_values = np.full(len(codes), np.nan)
+    d_values[found] = np.asarray(denominator, dtype=float)[pos[found]]
+
+    return codes, values / d_values
+
+
+###############################################################
+def _match_scale(s, late, denominator):
+    # ratio of the means of the early and late series where they overlap
+
+    codes, values = _ratio_codes(late, denominator)
+    keep = (codes >= s._start) & (codes < s._start + s._n)
+
+    early = s._values[codes[keep] - s._start]
+    values = values[keep]
+    both = ~np.isnan(early) & ~np.isnan(values)
+
+    if not both.any():
+        raise ValueError("late_scale='match' requires the series to overlap before the splice date.")
+
+    return early[both].mean() / values[both].mean()
+
+
+###############################################################
+def _quarter_means(sums, counts, min_months):
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts >= max(min_months, 1), sums / counts, np.nan)
@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented, count, stage
+
+## functions:
+### elasticity: compute_statespace_beveridge_elasticity
+### kalman: kalman_filter_rw2, kalman_smoother_rw2
+
+
+# variance of the approximate diffuse prior on the states, relative to the
+# measurement variance (as the 'approximate_diffuse' initialization of statsmodels)
+DIFFUSE_VAR = 1e6
+
+# default grid of the signal-to-noise ratios of the intercept and the elasticity. It
+# extends to 1e2 so that the maximum of the likelihood is inside the grid: on the
+# 1951-2019 data it is at q_level = q_slope = 10, where the states move more than
+# the measurement noise and the elasticity follows the data closely. The likelihood
+# is flat above 1 (it only gains 3 log points from 1 to 10): pass smaller ratios,
+# e.g. q_slope=1e-2, for a smoother path
+Q_GRID = np.r_[0., 10**np.linspace(-6, 2, 17)]
+
+
+###############################################################
+@instrumented
+def compute_statespace_beveridge_elasticity(log_u, log_v, q_level=None, q_slope=None):
+    '''
+    This function computes a time-varying Beveridge elasticity from the state-space
+    model of the Beveridge curve
+
+        log_v_t = a_t - e_t * log_u_t + eps_t,   eps_t ~ N(0, s2)
+        a_t = a_{t-1} + w_t,   w_t ~ N(0, q_level * s2)
+        e_t = e_{t-1} + z_t,   z_t ~ N(0, q_slope * s2)
+
+    where the intercept a_t and the elasticity e_t follow random walks. The elasticity
+    path is the Kalman smoother estimate, with its 95% CI. The measurement variance s2
+    is concentrated out of the likelihood, and the signal-to-noise ratios q_level and
+    q_slope are estimated by maximum likelihood over a grid, unless they are given.
+    Several series (e.g. regions or vintages) are estimated together when log_u and
+    log_v are DataFrames.
+
+    Parameters
+    -----------
+    log_u: pd.Series or pd.DataFrame
+        Log unemployment rate, one column per series.
+    log_v: pd.Series or pd.DataFrame
+        Log vacancy rate, with the same index and columns as log_u.
+    q_level: scalar or array, optional
+        Signal-to-noise ratio of the intercept, or grid of values. Default is Q_GRID.
+    q_slope: scalar or array, optional
+        Signal-to-noise ratio of the elasticity, or grid of values. Default is Q_GRID.
+
+    Returns
+    --------
+    pd.DataFrame
+        bev_e: beveridge elasticity and 95% CI estimates as time series, with columns
+        E, SE, LB, UB as in compute_beveridge_elasticity. A dict of such frames, keyed
+        by column, for DataFrame inputs.
+    pd.Series
+        params: estimated q_level, q_slope, sigma2 (s2) and log-likelihood. A DataFrame
+        with one row per column for DataFrame inputs.
+    '''
+
+    batched = isinstance(log_v, pd.DataFrame)
+
+    y = np.asarray(log_v, dtype=float).reshape(len(log_v), -1)
+    x = np.asarray(log_u, dtype=float).reshape(len(log_u), -1)
+
+    if x.shape != y.shape:
+        raise ValueError('log_u and log_v must have the same shape.')
+
+    n_series = y.shape[1]
+
+    grid_a = np.atleast_1d(Q_GRID if q_level is None else np.asarray(q_level, dtype=float))
+    grid_e = np.atleast_1d(Q_GRID if q_slope is None else np.asarray(q_slope, dtype=float))
+
+    if (grid_a < 0).any() or (grid_e < 0).any():
+        raise ValueError('q_level and q_slope must be non-negative.')
+
+    qa, qe = [g.ravel() for g in np.meshgrid(grid_a, grid_e, indexing='ij')]
+
+    if len(qa) > 1:
+        # every series with every grid point, in one batch
+        with stage('kalman_grid'):
+            loglike, _ = kalman_filter_rw2(np.repeat(y, len(qa), axis=1), np.repeat(x, len(qa), axis=1),
+                                           np.tile(qa, n_series), np.tile(qe, n_series))
+        best = np.nanargmax(loglike.reshape(n_series, len(qa)), axis=1)
+        qa, qe = qa[best], qe[best]
+    else:
+        qa, qe = np.repeat(qa, n_series), np.repeat(qe, n_series)
+
+    with stage('kalman_smooth'):
+        states, cov, loglike, sigma2 = kalman_smoother_rw2(y, x, qa, qe)
+
+    e = states[:, :, 1]
+    se = np.sqrt(cov[:, :, 2] * sigma2)
+
+    index = log_v.index if hasattr(log_v, 'index') else None
+    columns = log_v.columns if batched else [getattr(log_v, 'name', None)]
+
+    bev_e = {col: pd.DataFrame({'E': e[:, j], 'SE': se[:, j], 'LB': e[:, j] - 1.96*se[:, j],
+                                'UB': e[:, j] + 1.96*se[:, j]}, index=index)
+             for j, col in enumerate(columns)}
+
+    params = pd.DataFrame({'q_level': qa, 'q_slope': qe, 'sigma2': sigma2, 'loglike': loglike}, index=columns)
+
+    if batched:
+        return bev_e, params
+
+    return bev_e[columns[0]], params.iloc[0].rename(None)
+
+
+###############################################################
+def kalman_filter_rw2(y, x, q_level, q_slope, store=False):
+    '''
+    This function runs the Kalman filter of the random-walk-coefficient Beveridge curve
+    (see compute_statespace_beveridge_elasticity) on a batch of series, with closed-form
+    2x2 updates. Missing values are skipped. The variances are relative to the
+    measurement variance, which is concentrated out of the likelihood; the first two
+    observations of each series, which identify the states under the diffuse prior,
+    are left out of the likelihood.
+
+    Parameters
+    -----------
+    y: np.array
+        Log vacancy rates, shape (T, B).
+    x: np.array
+        Log unemployment rates, shape (T, B).
+    q_level: np.array
+        Signal-to-noise ratio of the intercept of each series, shape (B,).
+    q_slope: np.array
+        Signal-to-noise ratio of the elasticity of each series, shape (B,).
+    store: bool, optional
+        Whether to return the filtered and predicted states, for the smoother.
+
+    Returns
+    --------
+    np.array
+        loglike: concentrated log-likelihood of each series, shape (B,).
+    np.array
+        sigma2: estimated measurement variance of each series, shape (B,).
+    tuple of np.array, if store
+        Filtered states (T, B, 2) and covariances (T, B, 3), and predicted covariances
+        (T, B, 3); covariances hold the (aa, ae, ee) terms.
+    '''
+
+    n_obs, n_series = y.shape
+    q_level, q_slope = np.broadcast_to(q_level, (n_series,)), np.broadcast_to(q_slope, (n_series,))
+
+    # state (a, e) and covariance (p_aa, p_ae, p_ee), predicted for the first date
+    a, e = np.zeros(n_series), np.zeros(n_series)
+    p_aa, p_ae, p_ee = np.full(n_series, DIFFUSE_VAR), np.zeros(n_series), np.full(n_series, DIFFUSE_VAR)
+
+    seen = np.zeros(n_series, dtype=int)
+    sum_v2f = np.zeros(n_series)
+    sum_logf = np.zeros(n_series)
+
+    if store:
+        filt_states = np.empty((n_obs, n_series, 2))
+        filt_cov = np.empty((n_obs, n_series, 3))
+        pred_cov = np.empty((n_obs, n_series, 3))
+
+    for t in range(n_obs):
+
+        if store:
+            pred_cov[t] = np.column_stack((p_aa, p_ae, p_ee))
+
+        obs = np.isfinite(y[t]) & np.isfinite(x[t])
+        z = np.where(obs, -x[t], 0.)
+
+        # innovation v = y - (a + z e), its variance f, and the gain P Z'/ f
+        v = np.where(obs, y[t] - a - z*e, 0.)
+        pz_a = p_aa + z*p_ae
+        pz_e = p_ae + z*p_ee
+        f = pz_a + z*pz_e + 1.
+
+        k_a = np.where(obs, pz_a / f, 0.)
+        k_e = np.where(obs, pz_e / f, 0.)
+
+        a = a + k_a*v
+        e = e + k_e*v
+        p_aa = p_aa - k_a*pz_a
+        p_ae = p_ae - k_a*pz_e
+        p_ee = p_ee - k_e*pz_e
+
+        seen += obs
+        used = obs & (seen > 2)
+        sum_v2f += np.where(used, v*v/f, 0.)
+        sum_logf += np.where(used, np.log(f), 0.)
+
+        if store:
+            filt_states[t] = np.column_stack((a, e))
+            filt_cov[t] = np.column_stack((p_aa, p_ae, p_ee))
+
+        # random-walk transition
+        p_aa = p_aa + q_level
+        p_ee = p_ee + q_slope
+
+    count('kalman_steps', n_obs*n_series)
+
+    n_used = np.maximum(seen - 2, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma2 = sum_v2f / n_used
+        loglike = -0.5*(n_used*(np.log(2*np.pi*sigma2) + 1.) + sum_logf)
+
+    loglike[n_used == 0] = np.nan
+
+    if store:
+        return loglike, sigma2, (filt_states, filt_cov, pred_cov)
+
+    return loglike, sigma2
+
+
+###############################################################
+def kalman_smoother_rw2(y, x, q_level, q_slope):
+    '''
+    This function runs the Kalman filter and the Rauch-Tung-Striebel smoother of the
+    random-walk-coefficient Beveridge curve on a batch of series (see kalman_filter_rw2).
+
+    Parameters
+    -----------
+    y: np.array
+        Log vacancy rates, shape (T, B).
+    x: np.array
+        Log unemployment rates, shape (T, B).
+    q_level: np.array
+        Signal-to-noise ratio of the intercept of each series, shape (B,).
+    q_slope: np.array
+        Signal-to-noise ratio of the elasticity of each series, shape (B,).
+
+    Returns
+    --------
+    np.array
+        states: smoothed intercept and elasticity, shape (T, B, 2).
+    np.array
+        cov: smoothed covariances (aa, ae, ee) relative to sigma2, shape (T, B, 3).
+    np.array
+        loglike: concentrated log-likelihood of each series, shape (B,).
+    np.array
+        sigma2: estimated measurement variance of each series, shape (B,).
+    '''
+
+    loglike, sigma2, (states, cov, pred_cov) = kalman_filter_rw2(y, x, q_level, q_slope, store=True)
+
+    states, cov = states.copy(), cov.copy()
+
+    for t in range(len(y)-2, -1, -1):
+
+        f_aa, f_ae, f_ee = cov[t].T
+        n_aa, n_ae, n_ee = pred_cov[t+1].T
+
+        # gain J = P_t|t P_t+1|t^-1; the transition is the identity
+        det = n_aa*n_ee - n_ae**2
+        i_aa, i_ae, i_ee = n_ee/det, -n_ae/det, n_aa/det
+
+        j_aa = f_aa*i_aa + f_ae*i_ae
+        j_ae = f_aa*i_ae + f_ae*i_ee
+        j_ea = f_ae*i_aa + f_ee*i_ae
+        j_ee = f_ae*i_ae + f_ee*i_ee
+
+        # the predicted state at t+1 is the filtered state at t
+        d_a = states[t+1, :, 0] - states[t, :, 0]
+        d_e = states[t+1, :, 1] - states[t, :, 1]
+
+        states[t, :, 0] += j_aa*d_a + j_ae*d_e
+        states[t, :, 1] += j_ea*d_a + j_ee*d_e
+
+        # P_t|T = P_t|t + J (P_t+1|T - P_t+1|t) J'
+        m_aa, m_ae, m_ee = (cov[t+1] - pred_cov[t+1]).T
+
+        cov[t, :, 0] = f_aa + j_aa*(j_aa*m_aa + j_ae*m_ae) + j_ae*(j_aa*m_ae + j_ae*m_ee)
+        cov[t, :, 1] = f_ae + j_ea*(j_aa*m_aa + j_ae*m_ae) + j_ee*(j_aa*m_ae + j_ae*m_ee)
+        cov[t, :, 2] = f_ee + j_ea*(j_ea*m_aa + j_ee*m_ae) + j_ee*(j_ea*m_ae + j_ee*m_ee)
+
+    return states, cov, loglike, sigma2
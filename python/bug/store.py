@@ -0,0 +1,321 @@
+import datetime
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented, stage
+
+## functions:
+
+### store: ResultsStore
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    vintage TEXT NOT NULL,
+    params TEXT NOT NULL,
+    source TEXT,
+    bkps TEXT NOT NULL,
+    breaks TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_vintage ON runs (vintage, run_id);
+
+CREATE TABLE IF NOT EXISTS observations (
+    variable TEXT NOT NULL,
+    period TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    value REAL NOT NULL,
+    PRIMARY KEY (variable, period, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_run ON observations (run_id);
+
+CREATE TRIGGER IF NOT EXISTS runs_append_only_update BEFORE UPDATE ON runs
+    BEGIN SELECT RAISE(ABORT, 'the results store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_append_only_delete BEFORE DELETE ON runs
+    BEGIN SELECT RAISE(ABORT, 'the results store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS observations_append_only_update BEFORE UPDATE ON observations
+    BEGIN SELECT RAISE(ABORT, 'the results store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS observations_append_only_delete BEFORE DELETE ON observations
+    BEGIN SELECT RAISE(ABORT, 'the results store is append-only'); END;
+'''
+
+
+###############################################
+class ResultsStore():
+    """
+    Append-only local store of the results of run_gap_pipeline, keyed by data vintage
+    and parameter set, in a SQLite database.
+
+    Each run of the pipeline is appended with its vintage (the date of the data, e.g.
+    the ALFRED vintage date), its parameters and its breakpoints, and every value of its
+    frame (u, v, E, SE, LB, UB, u_star, gap, ...) is stored as one row of a table indexed
+    by variable and period, so that the history of a quarter across vintages is a single
+    index range. Runs are never updated or deleted.
+
+    The database is in write-ahead-log mode: readers never block, and each append is a
+    single short transaction with one batched insert, so that parallel workers (e.g.
+    `python -m bug run --jobs 4 --store ...`) can append to the same file, only waiting
+    for each other during the insert itself.
+
+    Attributes
+    ----------
+    path: Path
+        Location of the database.
+    """
+
+    def __init__(self, path, timeout=60.):
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # autocommit mode: transactions are opened explicitly, with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+        self._conn.executescript('BEGIN IMMEDIATE;' + _SCHEMA + 'COMMIT;')
+
+    @instrumented
+    def append(self, result, vintage=None, source=None):
+        '''
+        Append a result of run_gap_pipeline, and return its run id.
+
+        Parameters
+        -----------
+        result: GapResult
+            Result of run_gap_pipeline.
+        vintage: str, optional
+            Vintage date of the input data, e.g. '2023-05-05'. Default today.
+        source: str, optional
+            Description of the input data, e.g. the input file.
+
+        Returns
+        --------
+        int
+            run_id: id of the run in the store.
+        '''
+
+        return self.append_many([(result, vintage, source)])[0]
+
+    @instrumented
+    def append_many(self, results):
+        '''
+        Append several results in one transaction, and return their run ids.
+
+        Parameters
+        -----------
+        results: list of tuples
+            (result, vintage, source) tuples, as the arguments of append.
+
+        Returns
+        --------
+        list of int
+            Run ids.
+        '''
+
+        with stage('store_rows'):
+            rows = [(_run_row(result, vintage, source), _observation_rows(result))
+                    for result, vintage, source in results]
+
+        run_ids = []
+
+        with stage('store_write'), self._transaction():
+            for run, observations in rows:
+                run_id = self._conn.execute('INSERT INTO runs (vintage, params, source, bkps, breaks, created) '
+                                            'VALUES (?, ?, ?, ?, ?, ?)', run).lastrowid
+                self._conn.executemany('INSERT INTO observations (variable, period, run_id, value) '
+                                       'VALUES (?, ?, ?, ?)',
+                                       ((var, period, run_id, value) for var, period, value in observations))
+                run_ids.append(run_id)
+
+        return run_ids
+
+    def runs(self, params=None):
+        '''
+        Return the stored runs (vintage, parameters, source, breaks), with the given
+        parameters if any (e.g. {'zeta': 0.26, 'n_bkps': 5}).
+        '''
+
+        where, args = _params_clause(params)
+
+        df = pd.read_sql_query('SELECT run_id, vintage, params, source, breaks, created FROM runs r '
+                               'WHERE {} ORDER BY vintage, run_id'.format(where), self._conn, params=args,
+                               index_col='run_id')
+
+        df['params'] = df['params'].map(json.loads)
+        df['breaks'] = df['breaks'].map(json.loads)
+
+        return df
+
+    def vintages(self, period, variable='gap', params=None):
+        '''
+        Return the value of variable for period (e.g. '2022Q3') in every stored vintage,
+        as a pd.Series indexed by vintage (and run id, when a vintage was run with several
+        parameter sets).
+        '''
+
+        where, args = _params_clause(params)
+
+        df = pd.read_sql_query('SELECT r.vintage, o.run_id, o.value FROM observations o JOIN runs r USING (run_id) '
+                               'WHERE o.variable = ? AND o.period = ? AND {} '
+                               'ORDER BY r.vintage, o.run_id'.format(where), self._conn,
+                               params=[variable, str(period)] + args)
+
+        return df.set_index(['vintage', 'run_id'])['value'].rename(variable)
+
+    def latest(self, variable='gap', params=None, as_of=None):
+        '''
+        Return the value of variable for each period in the latest vintage that covers it
+        (on or before as_of, if given), as a DataFrame with columns vintage, run_id and
+        the variable, indexed by period. The runs must share one parameter set: when the
+        store holds several, params must select one (e.g. {'zeta': 0.26}), otherwise a
+        ValueError is raised.
+        '''
+
+        where, args = _params_clause(params)
+
+        if as_of is not None:
+            where += ' AND r.vintage <= ?'
+            args.append(_vintage(as_of))
+
+        sets = [json.loads(p) for p, in self._conn.execute(
+            'SELECT DISTINCT params FROM runs r WHERE {}'.format(where), args)]
+
+        if len(sets) > 1:
+            differ = sorted({k for p in sets for k in p if any(q.get(k) != p.get(k) for q in sets)})
+            raise ValueError('the runs have {} parameter sets, which differ in {}: select one with params, '
+                             'e.g. {!r}.'.format(len(sets), ', '.join(differ), {k: sets[0].get(k) for k in differ}))
+
+        df = pd.read_sql_query('SELECT period, vintage, run_id, value FROM ('
+                               '    SELECT o.period, r.vintage, o.run_id, o.value, ROW_NUMBER() OVER ('
+                               '        PARTITION BY o.period ORDER BY r.vintage DESC, o.run_id DESC) AS rank'
+                               '    FROM observations o JOIN runs r USING (run_id)'
+                               '    WHERE o.variable = ? AND {}'
+                               ') WHERE rank = 1 ORDER BY period'.format(where), self._conn,
+                               params=[variable] + args)
+
+        df = df.rename(columns={'value': variable}).set_index('period')
+        df.index = _to_periods(df.index)
+
+        return df
+
+    def frame(self, run_id):
+        '''
+        Return the frame of a stored run, as in GapResult.frame.
+        '''
+
+        df = pd.read_sql_query('SELECT period, variable, value FROM observations WHERE run_id = ?',
+                               self._conn, params=[int(run_id)])
+
+        if df.empty:
+            raise KeyError('no run {} in the store.'.format(run_id))
+
+        frame = df.pivot(index='period', columns='variable', values='value')
+        frame.index = _to_periods(frame.index)
+        frame.columns.name = None
+
+        return frame.sort_index()
+
+    def close(self):
+
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return 'ResultsStore({!r})'.format(str(self.path))
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+
+
+###############################################
+class _Transaction():
+    # BEGIN IMMEDIATE takes the write lock at the start, so that concurrent writers
+    # wait on the busy timeout instead of failing when upgrading a read transaction
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, *exc):
+        self._conn.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+
+
+
+###############################################################
+def _run_row(result, vintage, source):
+
+    params = json.dumps(result.params, sort_keys=True)
+    created = datetime.datetime.now().isoformat(timespec='seconds')
+
+    return (_vintage(vintage), params, None if source is None else str(source),
+            json.dumps([int(b) for b in result.bkps]), json.dumps([str(b) for b in result.breaks]), created)
+
+
+###############################################################
+def _observation_rows(result):
+    # (variable, period, value) of every non-missing value of the frame
+
+    frame = result.frame.astype(float)
+
+    values = frame.to_numpy().T
+    periods = np.asarray(frame.index.astype(str))
+
+    rows = []
+    for var, col in zip(frame.columns, values):
+        valid = np.isfinite(col)
+        rows.extend(zip([str(var)]*int(valid.sum()), periods[valid].tolist(), col[valid].tolist()))
+
+    return rows
+
+
+###############################################################
+def _params_clause(params):
+    # SQL condition on the stored parameters (JSON), e.g. {'zeta': 0.26, 'n_bkps': 5}
+
+    if not params:
+        return '1', []
+
+    clauses, args = [], []
+
+    for key, value in params.items():
+        if not str(key).isidentifier():
+            raise ValueError('invalid parameter name: {!r}'.format(key))
+        if value is None:
+            clauses.append("json_extract(r.params, '$.{}') IS NULL".format(key))
+        else:
+            clauses.append("json_extract(r.params, '$.{}') = ?".format(key))
+            args.append(int(value) if isinstance(value, bool) else value)
+
+    return ' AND '.join(clauses), args
+
+
+###############################################################
+def _vintage(vintage):
+
+    if vintage is None:
+        return datetime.date.today().isoformat()
+
+    return pd.Timestamp(vintage).strftime('%Y-%m-%d')
+
+
+###############################################################
+def _to_periods(index):
+
+    try:
+        return pd.PeriodIndex(index, freq='Q')
+    except (ValueError, TypeError):
+        return pd.Index(index)
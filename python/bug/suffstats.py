@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from .instrument import instrumented
+
 ## functions:
 ### unemployment: compute_unemployment_gap,
 ### efficiency: compute_efficient_unemployment, compute_efficient_tightness,
@@ -8,6 +10,7 @@ import pandas as pd
 
 
 ###############################################################
+@instrumented
 def compute_unemployment_gap(u, v, epsilon=None, zeta=0.26, kappa=0.92, use_sqrt_uv=False):
     '''
     This function computes the unemployment gap u_gap using the sufficient-statistic 
@@ -39,6 +42,7 @@ def compute_unemployment_gap(u, v, epsilon=None, zeta=0.26, kappa=0.92, use_sqrt
     return u_gap
     
 ###############################################################
+@instrumented
 def compute_efficient_unemployment(u, v, epsilon=None, zeta=0.26, kappa=0.92, use_sqrt_uv=False):
     '''
     This function computes the efficient unemployment rate using the sufficient-statistic 
@@ -82,6 +86,7 @@ def compute_efficient_unemployment(u, v, epsilon=None, zeta=0.26, kappa=0.92, us
     return u_star
     
 ###############################################################
+@instrumented
 def compute_efficient_tightness(epsilon, zeta=0.26, kappa=0.92):
     '''
     This function computes the efficient labor-market tightness using the sufficient-
@@ -107,6 +112,7 @@ def compute_efficient_tightness(epsilon, zeta=0.26, kappa=0.92):
     return (1. - zeta) / (kappa * epsilon)
     
 ###############################################################
+@instrumented
 def compute_beveridge_inverse(theta, zeta=0.26, kappa=0.92):
     '''
     This function computes the inverse-optimum Beveridge elasticity using the 
@@ -132,6 +138,7 @@ def compute_beveridge_inverse(theta, zeta=0.26, kappa=0.92):
     return (1.0 - zeta) / (kappa * theta)
     
 ###############################################################
+@instrumented
 def compute_recruiting_inverse(theta, epsilon, zeta=0.26):
     '''
     This function computes the inverse-optimum recruiting cost using the 
@@ -157,6 +164,7 @@ def compute_recruiting_inverse(theta, epsilon, zeta=0.26):
     return (1. - zeta) / (epsilon * theta)
     
 ###############################################################
+@instrumented
 def compute_nonwork_inverse(theta, epsilon, kappa=0.92):
     '''
     This function computes the inverse-optimum social value of nonwork using the 
@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# the package is used from the source tree, with a throw-away data cache
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('BUG_CACHE_DIR', tempfile.mkdtemp(prefix='bug-cache-'))
+
+FIGURES_XLSX = Path(__file__).resolve().parents[2] / 'figures' / 'xlsx'
+
+
+@pytest.fixture(scope='session')
+def cached_inputs():
+    from bug.pipeline import load_cached_inputs
+    return load_cached_inputs()
+
+
+def read_matlab_table(name, xlsx_dir=FIGURES_XLSX):
+    # values of a table in the layout of the figure*.m scripts: source, header, then year, quarter, values
+
+    import pandas as pd
+
+    df = pd.read_excel(Path(xlsx_dir) / (name + '.xlsx'), header=None, skiprows=2)
+    index = pd.PeriodIndex(['{}Q{}'.format(y, q) for y, q in zip(df[0].astype(int), df[1].astype(int))], freq='Q')
+
+    return df.iloc[:, 2:].set_axis(index)
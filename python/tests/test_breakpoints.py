@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from statsmodels.regression.rolling import RollingOLS
+
+from bug.breakpoints import BkpsEval, _calc_hac_lag, compute_rolling_beveridge_elasticity, evaluate_num_breaks
+
+
+@pytest.fixture(scope='module')
+def bkps_eval():
+    rng = np.random.default_rng(0)
+    log_u = rng.normal(-3., 0.3, size=120)
+    log_v = np.where(np.arange(120) < 60, -6.2, -5.8) - 0.9*log_u + rng.normal(scale=0.05, size=120)
+    signal = np.column_stack((log_v, log_u, np.ones(120)))
+    return evaluate_num_breaks(signal, 3, min_size=15, backend='native')
+
+
+@pytest.mark.parametrize('name', ['bkps.npz', 'bkps', 'bkps.eval'])
+@pytest.mark.parametrize('mmap', [True, False])
+def test_save_load_round_trip(bkps_eval, tmp_path, name, mmap):
+    path = tmp_path / name
+    bkps_eval.save(path)
+
+    assert list(tmp_path.iterdir()) == [path]
+
+    loaded = BkpsEval.load(path, mmap=mmap)
+
+    assert loaded.min_size == bkps_eval.min_size
+    for name in BkpsEval._ARRAYS:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(bkps_eval, name))
+    assert loaded.get_bkps(1) == bkps_eval.get_bkps(1)
+
+
+def test_rolling_fits_match_statsmodels():
+    rng = np.random.default_rng(1)
+    log_u = pd.Series(rng.normal(-3., 0.3, size=150))
+    log_v = -6. - 0.9*log_u + rng.normal(scale=0.05, size=150)
+    log_v[[30, 31, 100]] = np.nan
+
+    bev_e = compute_rolling_beveridge_elasticity(log_u, log_v, window=40, full_output=True)
+
+    # the windows that are too short or hold a missing value are nan
+    skipped = log_v.isna().rolling(40, min_periods=40).sum().fillna(1) > 0
+    assert bev_e.isna().all(axis=1).equals(skipped)
+
+    # the lstsq method refits each window, the default one drifts after missing values
+    expected = RollingOLS(log_v, sm.add_constant(log_u), window=40, missing='skip').fit(method='lstsq')
+    valid = ~skipped
+
+    np.testing.assert_allclose(bev_e['intercept'][valid], expected.params['const'][valid], rtol=1e-9)
+    np.testing.assert_allclose(bev_e['E'][valid], - expected.params[0][valid], rtol=1e-9)
+    np.testing.assert_allclose(bev_e['SSR'][valid], expected.ssr[valid], rtol=1e-7)
+
+    # HAC standard errors of a few windows
+    for end in (45, 120, 150):
+        fit = sm.OLS(log_v[end-40:end], sm.add_constant(log_u[end-40:end])).fit(
+            cov_type='HAC', cov_kwds={'maxlags': _calc_hac_lag(40), 'use_correction': True})
+        np.testing.assert_allclose(bev_e['SE'].iloc[end-1], fit.bse[0], rtol=1e-8)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bug.data import cached_frame, _map_entry, _write_entry
+
+
+def _builder():
+    index = pd.period_range('2000Q1', periods=4, freq='Q')
+    return pd.DataFrame({'u': [0.05, 0.06, 0.07, 0.06], 'v': [0.04, 0.03, 0.03, 0.04]}, index=index)
+
+
+def test_cached_frames_are_independent(tmp_path):
+    first = cached_frame('frame', _builder, cache_dir=tmp_path)
+    second = cached_frame('frame', _builder, cache_dir=tmp_path)
+
+    # same mapped values, different frames
+    assert first is not second
+    assert np.shares_memory(first['u'].to_numpy(), second['u'].to_numpy())
+
+    first['gap'] = 0.
+    first['u'] = 1.
+
+    third = cached_frame('frame', _builder, cache_dir=tmp_path)
+    for frame in (second, third):
+        assert 'gap' not in frame.columns
+        pd.testing.assert_frame_equal(frame, _builder(), check_freq=False)
+
+
+def test_cached_values_are_read_only(tmp_path):
+    frame = cached_frame('frame', _builder, cache_dir=tmp_path)
+
+    with pytest.raises(ValueError, match='read-only'):
+        frame.iloc[0, 0] = 1.
+
+    assert cached_frame('frame', _builder, cache_dir=tmp_path).iloc[0, 0] == 0.05
+
+
+def test_rewrites_keep_the_previous_generation(tmp_path):
+    entry = tmp_path / 'frame'
+    frame = _builder()
+
+    metas = [_write_entry(entry, frame * k, [], 0) for k in (1, 2, 3)]
+
+    # a reader holding the previous meta can still map it, and one holding an
+    # older (swept) meta maps the current generation
+    assert sorted(p.name for p in entry.iterdir() if p.is_dir()) == sorted(m['token'] for m in metas[1:])
+    pd.testing.assert_frame_equal(_map_entry(entry, metas[1]), frame * 2, check_freq=False)
+    pd.testing.assert_frame_equal(_map_entry(entry, metas[0]), frame * 3, check_freq=False)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from bug.dmpmodel import compute_hosios_efficiency, simulate_dmp_scenarios
+
+
+def test_scenarios_reproduce_hosios_efficiency():
+    rng = np.random.default_rng(0)
+    eta = pd.Series(rng.uniform(0.4, 0.7, size=40))
+    lamb = pd.Series(rng.uniform(0.08, 0.12, size=40))
+    omega = pd.Series(rng.uniform(1.5, 2.5, size=40))
+
+    u_star, theta_star = compute_hosios_efficiency(eta, lamb, omega, u0=0.05)
+    sim = simulate_dmp_scenarios(lamb.to_numpy(), omega.to_numpy(), eta.to_numpy(), 1.0, u0=0.06, u_star0=0.05)
+
+    np.testing.assert_allclose(sim.theta_star[0], theta_star, rtol=1e-10)
+    np.testing.assert_allclose(sim.u_star[0], u_star, rtol=1e-10)
+
+
+def test_initial_rates_per_scenario_with_common_paths():
+    u0 = np.array([0.04, 0.06, 0.08])
+
+    sim = simulate_dmp_scenarios(0.1, 2.0, 0.55, 0.8, u0=u0)
+    assert sim.u.shape == (3, 1)
+    np.testing.assert_array_equal(sim.u[:, 0], u0)
+
+    sim = simulate_dmp_scenarios(np.full(12, 0.1), 2.0, 0.55, 0.8, u0=u0, u_star0=[0.05, 0.05, 0.06])
+    assert sim.u.shape == (3, 12)
+    np.testing.assert_array_equal(sim.u[:, 0], u0)
+    np.testing.assert_array_equal(sim.u_star[:, 0], [0.05, 0.05, 0.06])
+    # same paths: the scenarios converge to the same rate
+    np.testing.assert_allclose(sim.u[:, -1], sim.u[0, -1], rtol=1e-3)
+    assert sim.quantiles('u').shape == (12, 7)
+
+
+def test_tightness_defaults_to_the_hosios_condition():
+    lamb, omega, eta = np.full(20, 0.1), 2.0, np.linspace(0.5, 0.6, 20)
+
+    sim = simulate_dmp_scenarios(lamb, omega, eta, None, u0=[0.05, 0.07])
+    efficient = simulate_dmp_scenarios(lamb, omega, eta, sim.theta_star[0], u0=[0.05, 0.07])
+
+    np.testing.assert_array_equal(sim.theta, sim.theta_star)
+    np.testing.assert_allclose(sim.u, efficient.u, rtol=1e-12)
+    # u and u_star follow the same law of motion from different starts
+    assert abs(sim.gap[0, -1]) < abs(sim.gap[0, 0]) and abs(sim.gap[1, -1]) < abs(sim.gap[1, 0])
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bug.__main__ import _build_parser
+from bug.figures import build_figures, compute_figure_data
+
+from conftest import read_matlab_table
+
+
+@pytest.mark.parametrize('name, atol', [('figureA1', 1e-6), ('figureA2', 1e-5)])
+def test_job_rate_tables_match_matlab(tmp_path, name, atol):
+    status = build_figures(tmp_path, names=[name], jobs=1)
+    assert status[name + '.xlsx'] == 'built'
+
+    built = read_matlab_table(name, tmp_path / 'xlsx')
+    committed = read_matlab_table(name)
+
+    assert built.index.equals(committed.index)
+    np.testing.assert_allclose(built.to_numpy(dtype=float), committed.to_numpy(dtype=float), atol=atol)
+
+
+
+def test_figures_are_not_built_over_the_matlab_output():
+    assert _build_parser().parse_args(['figures']).output_dir == Path('build', 'figures')
+
+
+def test_elasticity_bands_are_within_the_documented_hac_difference(cached_inputs):
+    data = compute_figure_data()
+    committed = read_matlab_table('figure6')
+
+    np.testing.assert_allclose(data['E'], committed[2], atol=1e-4)
+    for built, col in (('LB', 3), ('UB', 4)):
+        assert np.abs(data[built] - committed[col]).max() < 0.12
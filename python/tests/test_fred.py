@@ -0,0 +1,83 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from bug.fred import fetch_fred_series, load_fred_vintage
+
+SERIES = {'UNRATE': b'DATE,UNRATE\n2019-10-01,3.6\n2019-11-01,3.6\n2019-12-01,3.6\n',
+          'SHORT': b'DATE,SHORT\n2019-10-01,1.0\n2019-11-01,.\n'}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # stand-in for fredgraph.csv, with ETag revalidation and the cosd start date
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        sid = query['id'][0]
+        etag = '"{}{}"'.format(sid, query.get('cosd', [''])[0])
+        lines = SERIES[sid].splitlines(keepends=True)
+        body = lines[0] + b''.join(l for l in lines[1:] if l[:10].decode() >= query.get('cosd', [''])[0])
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', 'Fri, 03 Jan 2020 08:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fred_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+
+
+def test_revalidated_series_are_served_from_the_store(fred_url, tmp_path):
+    first = fetch_fred_series('UNRATE', base_url=fred_url, cache_dir=tmp_path)['UNRATE']
+    again = fetch_fred_series('UNRATE', base_url=fred_url, cache_dir=tmp_path)['UNRATE']
+
+    assert first.index.freqstr == 'M'
+    assert again.attrs['vintage'] == first.attrs['vintage'] == '2020-01-03'
+    assert again.equals(first)
+
+
+def test_short_series_need_their_frequency(fred_url, tmp_path):
+    with pytest.raises(ValueError, match='frequency'):
+        fetch_fred_series('SHORT', base_url=fred_url, cache_dir=tmp_path)
+
+    short = fetch_fred_series('SHORT', base_url=fred_url, cache_dir=tmp_path, frequency={'SHORT': 'M'})['SHORT']
+    assert list(short.index.astype(str)) == ['2019-10', '2019-11']
+
+
+def test_attrs_are_set_on_a_copy(fred_url, tmp_path):
+    fetch_fred_series('UNRATE', base_url=fred_url, cache_dir=tmp_path)
+
+    series = load_fred_vintage('UNRATE', cache_dir=tmp_path)
+    series.attrs['note'] = 'changed'
+
+    assert 'note' not in load_fred_vintage('UNRATE', cache_dir=tmp_path).attrs
+
+
+@pytest.mark.parametrize('vintage_date', [None, '2020-01-03'])
+def test_stored_vintages_serve_any_start(fred_url, tmp_path, vintage_date):
+    def fetch(start):
+        return fetch_fred_series('UNRATE', start=start, vintage_date=vintage_date, base_url=fred_url,
+                                 cache_dir=tmp_path)['UNRATE']
+
+    late, early = fetch('2019-11-01'), fetch('2019-08-01')
+
+    assert list(late.index.astype(str)) == ['2019-11', '2019-12']
+    assert list(early.index.astype(str)) == ['2019-10', '2019-11', '2019-12']
+    assert list(fetch('2019-11-01').index.astype(str)) == ['2019-11', '2019-12']
@@ -0,0 +1,21 @@
+from bug import instrument
+from bug.instrument import count, profile, stage
+
+
+def test_nested_recorders_pass_events_to_the_outer_one():
+    with profile() as outer:
+        with stage('before'):
+            pass
+        with profile() as inner:
+            with stage('inner'):
+                count('cells', 2)
+        assert instrument._RECORDER is outer
+        count('cells')
+
+    assert instrument._RECORDER is None
+    assert [ev['name'] for ev in inner.events] == ['inner']
+    assert [ev['name'] for ev in outer.events] == ['before', 'inner']
+    assert inner.counters == {'cells': 2}
+    assert outer.counters == {'cells': 3}
+    # event times are relative to the start of each recorder
+    assert outer.events[1]['start'] >= inner.events[0]['start']
@@ -0,0 +1,46 @@
+import numpy as np
+
+from bug.instrument import profile
+from bug.pipeline import run_gap_pipeline
+
+from conftest import read_matlab_table
+
+
+def test_cached_inputs_keep_the_flows_past_u(cached_inputs):
+    # the job rates of the last month of u need the unemployment levels of the next month
+    assert cached_inputs['u_level'].last_valid_index() > cached_inputs['u'].last_valid_index()
+
+
+def test_job_rates_match_matlab(cached_inputs):
+    frame = run_gap_pipeline(cached_inputs, efficiency=True).frame
+
+    f = read_matlab_table('figureA1')[2]
+    lamb = read_matlab_table('figureA2')[2]
+
+    # the last quarter, 2019Q4, uses the January 2020 levels
+    assert frame.index[-1] == f.index[-1]
+    np.testing.assert_allclose(frame['f'].iloc[-1], 1.465182, atol=1e-6)
+    np.testing.assert_allclose(frame['lambda'].iloc[-1], 0.05391, atol=1e-5)
+
+    np.testing.assert_allclose(frame['f'].reindex(f.index), f, atol=1e-6)
+    np.testing.assert_allclose(frame['lambda'].reindex(lamb.index), lamb, atol=1e-5)
+
+
+def test_quarters_with_missing_months_are_dropped(cached_inputs):
+    inputs = cached_inputs.copy()
+    inputs.loc['2020-01':, 'u_level'] = np.nan
+
+    frame = run_gap_pipeline(inputs, efficiency=True).frame
+
+    assert np.isnan(frame['f'].iloc[-1]) and np.isnan(frame['lambda'].iloc[-1])
+    assert np.isnan(frame['theta_star_hosios'].iloc[-1])
+    assert frame[['f', 'lambda', 'theta_star_hosios']].iloc[:-1].notna().all().all()
+
+
+def test_stage_timings_are_also_profiled(cached_inputs):
+    with profile() as rec:
+        result = run_gap_pipeline(cached_inputs)
+
+    stages = ['aggregate', 'breakpoints', 'elasticity', 'gap']
+    assert list(result.timings) == stages
+    assert set(stages) <= set(rec.summary()['stage'])
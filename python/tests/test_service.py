@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bug.service import GapService
+
+
+@pytest.fixture(scope='module')
+def server(cached_inputs):
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+    proc = subprocess.Popen([sys.executable, '-m', 'bug', 'serve', '--port', str(port), '--workers', '2'],
+                            stdout=subprocess.PIPE, text=True, env=env)
+
+    try:
+        assert 'serving' in proc.stdout.readline()
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _request(port, path):
+    # raw HTTP/1.1 request with Connection: close, read to EOF
+
+    with socket.create_connection(('127.0.0.1', port), timeout=60) as sock:
+        sock.sendall('GET {} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.format(path).encode())
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    head, _, body = b''.join(chunks).partition(b'\r\n\r\n')
+
+    return head.decode('latin-1'), json.loads(body)
+
+
+def test_connection_close_responses_end_with_eof(server):
+    # the first /gap request runs the estimations in the worker processes, which
+    # must not hold the connection open
+    for _ in range(2):
+        head, body = _request(server, '/gap?n_bkps=5')
+        assert head.startswith('HTTP/1.1 200')
+        assert len(body['breaks']) == 5
+
+    head, body = _request(server, '/metrics')
+    assert body['cache']['response'] == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.parametrize('query', ['n_bkps=-1', 'n_bkps=40', 'min_size=0', 'min_size=200', 'n_bkps=x'])
+def test_invalid_settings_are_bad_requests(server, query):
+    head, body = _request(server, '/gap?' + query)
+    assert head.startswith('HTTP/1.1 400')
+    assert 'error' in body
+
+
+def test_metrics_endpoint(server):
+    _request(server, '/gap?zeta=0.3')
+    _request(server, '/gap?n_bkps=-1')
+    head, body = _request(server, '/metrics')
+
+    assert head.startswith('HTTP/1.1 200')
+    assert body['requests'] >= 2 and body['errors'] >= 1 and body['inflight'] == 0
+    assert set(body['latency_ms']['/gap']) == {'count', 'p50', 'p90', 'p99', 'max'}
+    assert set(body['cache']) == {'response', 'breakpoints', 'elasticity'}
+
+
+@pytest.fixture
+def run_service(cached_inputs):
+    # runs a coroutine taking a started GapService
+
+    def run(coro, **kwargs):
+        async def main():
+            service = GapService(cached_inputs, workers=1, **kwargs)
+            try:
+                await service.start()
+                return await coro(service), service.snapshot()
+            finally:
+                service.close()
+        return asyncio.run(main())
+
+    return run
+
+
+def test_identical_concurrent_requests_are_coalesced(run_service):
+    async def requests(service):
+        return await asyncio.gather(*[service.gap(n_bkps=4) for _ in range(3)])
+
+    responses, metrics = run_service(requests)
+
+    assert responses[0] == responses[1] == responses[2]
+    assert metrics['coalesced'] == 2
+    assert metrics['cache']['response'] == {'hits': 0, 'misses': 1}
+    assert metrics['cache']['breakpoints']['misses'] == 1
+
+
+def test_lru_hits_and_evictions(run_service):
+    async def requests(service):
+        first = await service.gap(zeta=0.2)
+        await service.gap(zeta=0.3)
+        again = await service.gap(zeta=0.3)
+        # zeta=0.2 was evicted by zeta=0.3
+        evicted = await service.gap(zeta=0.2)
+        return first, again, evicted
+
+    (first, again, evicted), metrics = run_service(requests, cache_size=1)
+
+    assert first == evicted
+    assert again['params']['zeta'] == 0.3
+    assert metrics['cache']['response'] == {'hits': 1, 'misses': 3}
+    # the breakpoints and elasticities do not depend on zeta
+    assert metrics['cache']['breakpoints'] == {'hits': 2, 'misses': 1}
+    assert metrics['cache']['elasticity'] == {'hits': 2, 'misses': 1}
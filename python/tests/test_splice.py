@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bug.splice import Splice, monthly_to_quarterly, splice_series
+
+
+@pytest.fixture
+def monthly():
+    rng = np.random.default_rng(0)
+    index = pd.period_range('1999-01', '2003-12', freq='M')
+    values = rng.uniform(1., 2., size=(len(index), 2))
+    values[[4, 9, 10, 30], 0] = np.nan
+    return pd.DataFrame(values, index=index, columns=['a', 'b'])
+
+
+@pytest.mark.parametrize('min_months', [1, 3])
+def test_arrays_and_series_give_the_same_averages(monthly, min_months):
+    expected = monthly_to_quarterly(monthly, min_months=min_months)
+
+    np.testing.assert_array_equal(monthly_to_quarterly(monthly.to_numpy(), min_months=min_months),
+                                  expected.to_numpy())
+    np.testing.assert_array_equal(monthly_to_quarterly(monthly['a'].to_numpy(), min_months=min_months),
+                                  expected['a'].to_numpy())
+
+
+def test_empty_input_is_rejected(monthly):
+    for data in (monthly.iloc[:0], monthly['a'].iloc[:0], np.empty((0, 2))):
+        with pytest.raises(ValueError, match='at least one monthly observation'):
+            monthly_to_quarterly(data)
+
+
+def test_incremental_appends_match_a_full_rebuild(monthly):
+    early, late = monthly['a'], monthly['b'] * 3.
+    revised = late.copy()
+    revised.iloc[-8:] *= 1.1
+
+    s = Splice(early.loc[:'2000-12'], '2001-01', min_months=2)
+    s.append(late.loc[:'2001-05'])
+    s.append(late.loc['2001-06':'2002-11'])
+    s.append(revised.loc['2002-06':])
+
+    monthly_full, quarterly_full = splice_series(early, revised, '2001-01', min_months=2)
+
+    pd.testing.assert_series_equal(s.monthly, monthly_full, check_freq=False)
+    pd.testing.assert_series_equal(s.quarterly, quarterly_full, check_freq=False)
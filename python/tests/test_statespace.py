@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from bug.statespace import DIFFUSE_VAR, compute_statespace_beveridge_elasticity
+
+
+@pytest.fixture(scope='module')
+def beveridge():
+    rng = np.random.default_rng(0)
+    log_u = rng.normal(-3., 0.3, size=120)
+    log_v = -6. + np.cumsum(rng.normal(0., 0.02, size=120)) - 0.9*log_u + rng.normal(0., 0.05, size=120)
+    log_v[[10, 50]] = np.nan
+    return log_u, log_v
+
+
+def test_constant_elasticity_matches_unobserved_components(beveridge):
+    # with q_slope = 0, the model is a local level with a regression on log_u
+    log_u, log_v = beveridge
+
+    bev_e, params = compute_statespace_beveridge_elasticity(log_u, log_v, q_level=0.2, q_slope=0.)
+    s2 = params['sigma2']
+
+    model = sm.tsa.UnobservedComponents(log_v, level='llevel', exog=log_u, mle_regression=False)
+    model.initialize_approximate_diffuse(DIFFUSE_VAR * s2)
+    res = model.smooth([s2, 0.2*s2])
+
+    np.testing.assert_allclose(params['loglike'], res.llf, rtol=1e-9)
+    np.testing.assert_allclose(bev_e['E'], - res.smoothed_state[1], rtol=1e-9)
+    # the first two periods are in the diffuse phase, where statsmodels loses precision
+    np.testing.assert_allclose(bev_e['SE'][2:], np.sqrt(res.smoothed_state_cov[1, 1, 2:]), rtol=1e-6)
@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from bug.__main__ import main
+from bug.pipeline import run_gap_pipeline
+from bug.store import ResultsStore
+
+
+@pytest.fixture(scope='module')
+def results(cached_inputs):
+    # two vintages with the default parameters, and a run with another zeta
+    # the default min_size is 15% of the sample: it is given for the shorter vintage
+    early = run_gap_pipeline(cached_inputs.loc[:'2018-12'], min_size=41)
+    late = run_gap_pipeline(cached_inputs)
+    other = run_gap_pipeline(cached_inputs, zeta=0.5)
+    return early, late, other
+
+
+@pytest.fixture
+def store(tmp_path, results):
+    early, late, other = results
+    with ResultsStore(tmp_path / 'results.sqlite') as store:
+        store.append_many([(early, '2019-01-04', None), (late, '2020-01-10', None), (other, '2020-01-10', None)])
+        yield store
+
+
+def test_runs_are_append_only(store):
+    for statement in ('UPDATE runs SET vintage = 0', 'DELETE FROM runs',
+                      'UPDATE observations SET value = 0', 'DELETE FROM observations'):
+        with pytest.raises(sqlite3.DatabaseError, match='append-only'):
+            store._conn.execute(statement)
+
+    assert len(store.runs()) == 3
+
+
+def test_default_and_explicit_parameters_are_one_set(results, store):
+    early, late, _ = results
+
+    assert late.params['min_size'] == 41 and late.params['n_bkps'] == 5
+    assert early.params == late.params
+    assert list(store.runs({'min_size': 41, 'n_bkps': 5, 'zeta': 0.26}).index) == [1, 2]
+
+
+def test_latest_needs_one_parameter_set(results, store):
+    early, late, other = results
+
+    with pytest.raises(ValueError, match='differ in .*zeta'):
+        store.latest()
+
+    latest = store.latest(params={'zeta': 0.26})
+    assert latest.loc['2018Q4', 'vintage'] == '2020-01-10'
+    assert latest.loc['2019Q4', 'gap'] == late.frame.loc['2019Q4', 'gap']
+    assert (store.latest(params={'zeta': 0.5})['gap'] == other.frame['gap']).all()
+
+    # as of 2019, the 2018Q4 value is that of the first vintage
+    as_of = store.latest(params={'zeta': 0.26}, as_of='2019-06-30')
+    assert as_of.index[-1] == early.frame.index[-1]
+    assert as_of.loc['2018Q4', 'gap'] == early.frame.loc['2018Q4', 'gap']
+
+
+def test_vintages_of_a_period(results, store):
+    early, late, other = results
+
+    history = store.vintages('2018Q4', params={'zeta': 0.26})
+    assert list(history.index) == [('2019-01-04', 1), ('2020-01-10', 2)]
+    assert list(history) == [early.frame.loc['2018Q4', 'gap'], late.frame.loc['2018Q4', 'gap']]
+
+    assert len(store.vintages('2018Q4')) == 3
+    assert store.vintages('2019Q4', 'E', params={'zeta': 0.5}).iloc[0] == other.frame.loc['2019Q4', 'E']
+
+
+def test_vintages_command_filters_parameters(store, capsys):
+    assert main(['vintages', str(store.path)]) == 2
+    assert 'parameter sets' in capsys.readouterr().err
+
+    assert main(['vintages', str(store.path), '--zeta', '0.5', '--n-bkps', '5']) == 0
+    assert '2019Q4' in capsys.readouterr().out